@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Iterable, Optional
+
+"""
+Small state files the action's scripts reuse between steps, jobs and workflow runs.
+
+Composite action steps run directly on the runner, while docker action steps run in a container
+where $RUNNER_TEMP/_github_home is mounted as /github/home. The cache directory is placed under
+that home directory so both kinds of steps see the same files. Workflows can persist it between
+runs with actions/cache, using the path ${{ runner.temp }}/_github_home/.cache/dagster-cloud-action
+"""
+
+CACHE_DIR_ENV_VAR = "DAGSTER_CLOUD_ACTION_CACHE_DIR"
+CONTAINER_HOME = "/github/home"
+
+
+def cache_dir(*subdirs: str) -> str:
+    base_dir = os.getenv(CACHE_DIR_ENV_VAR)
+    if not base_dir:
+        if os.path.isdir(CONTAINER_HOME):
+            home = CONTAINER_HOME
+        elif os.getenv("RUNNER_TEMP"):
+            home = os.path.join(os.environ["RUNNER_TEMP"], "_github_home")
+        else:
+            home = os.path.expanduser("~")
+        base_dir = os.path.join(home, ".cache", "dagster-cloud-action")
+    path = os.path.join(base_dir, *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def hash_files(paths: Iterable[str], *extra: str, root: Optional[str] = None) -> str:
+    """Returns a hex digest of the names and contents of paths, skipping missing files.
+
+    Names are hashed relative to root when given, so the digest does not depend on where the
+    repository is checked out. Any extra strings are mixed into the digest.
+    """
+    digest = hashlib.sha256()
+    for value in extra:
+        digest.update(value.encode("utf-8") + b"\0")
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        name = os.path.relpath(path, root) if root else os.path.normpath(path)
+        digest.update(name.encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def store_json(path: str, data: Any):
+    # write to a temp file and rename, so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+# Deploys the images built by several jobs with one workspace update.
+#
+# Each build job writes a JSON file with its location (the `location` input of the deploy actions)
+# and the image tag it pushed. This runs `dagster-cloud ci init` for all of these locations,
+# records each image with `ci set-build-output`, then runs `ci deploy`, which updates all locations
+# in one request and waits for them to load concurrently, instead of one add-location per job.
+#
+# `ci set-build-output` only takes the image tag and reads the registry from dagster_cloud.yaml,
+# while the build jobs push to the registry of their `location` input. The locations are therefore
+# deployed from a copy of dagster_cloud.yaml, next to the original so relative paths still
+# resolve, with build.registry set to the registry each job pushed to.
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+import ci_context
+from stream_output import run
+
+_ARCH = "aarch64" if platform.machine() == "aarch64" else "x86_64"
+DAGSTER_CLOUD_PEX_PATH = Path(__file__).parent.parent / f"generated/gha/dagster-cloud-{_ARCH}.pex"
+
+
+def load_build_outputs(build_output_dir: str) -> List[dict]:
+    outputs = []
+    for path in sorted(glob.glob(os.path.join(build_output_dir, "**", "*.json"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            outputs.append(json.load(f))
+    return outputs
+
+
+def cli(*args) -> List[str]:
+    pex_path = os.getenv("DAGSTER_CLOUD_PEX") or str(DAGSTER_CLOUD_PEX_PATH)
+    return [pex_path, "-m", "dagster_cloud_cli.entrypoint", *args]
+
+
+def check_run(args):
+    returncode, _ = run(args)
+    if returncode:
+        print(f"::error title=Deploy failed::Failed to run {' '.join(args[3:5])}", flush=True)
+        sys.exit(returncode)
+
+
+def write_location_file(location_file: str, outputs: List[dict]) -> str:
+    """Writes a copy of location_file with the registry each location was pushed to."""
+    with open(location_file, encoding="utf-8") as f:
+        workspace_yaml = yaml.safe_load(f)
+    registries = {
+        output["name"]: output["registry"] for output in outputs if output.get("registry")
+    }
+    for location in workspace_yaml["locations"]:
+        if location["location_name"] in registries:
+            location["build"] = {
+                **(location.get("build") or {}),
+                "registry": registries[location["location_name"]],
+            }
+    fd, path = tempfile.mkstemp(
+        prefix=".dagster-batch-deploy-", suffix=".yaml", dir=os.path.dirname(location_file) or "."
+    )
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        yaml.safe_dump(workspace_yaml, f)
+    return path
+
+
+def batch_deploy(build_outputs: List[dict], deployment: str):
+    commit_hash = os.getenv("GITHUB_SHA", "")
+    repo_url = f"{os.getenv('GITHUB_SERVER_URL')}/{os.getenv('GITHUB_REPOSITORY')}"
+    outputs_by_file: Dict[str, List[dict]] = defaultdict(list)
+    for output in build_outputs:
+        outputs_by_file[output["location_file"]].append(output)
+
+    for location_file, outputs in outputs_by_file.items():
+        print(f"Deploying {len(outputs)} locations from {location_file}", flush=True)
+        # ci commands share state through this directory
+        os.environ["DAGSTER_BUILD_STATEDIR"] = tempfile.mkdtemp(prefix="dagster-batch-deploy-")
+        deploy_location_file = write_location_file(location_file, outputs)
+        try:
+            deploy_locations(deploy_location_file, outputs, deployment, repo_url, commit_hash)
+        finally:
+            os.remove(deploy_location_file)
+
+
+def deploy_locations(
+    location_file: str, outputs: List[dict], deployment: str, repo_url: str, commit_hash: str
+):
+    check_run(
+        cli(
+            "ci",
+            "init",
+            f"--project-dir={os.path.dirname(location_file) or '.'}",
+            f"--dagster-cloud-yaml-path={os.path.basename(location_file)}",
+            f"--deployment={deployment}",
+            f"--status-url={repo_url}/actions/runs/{os.getenv('GITHUB_RUN_ID')}",
+            f"--git-url={repo_url}/tree/{commit_hash}",
+            f"--commit-hash={commit_hash}",
+            *[f"--location-name={output['name']}" for output in outputs],
+        )
+    )
+    for output in outputs:
+        check_run(
+            cli(
+                "ci",
+                "set-build-output",
+                f"--location-name={output['name']}",
+                f"--image-tag={output['image_tag']}",
+            )
+        )
+    check_run(cli("ci", "deploy"))
+    run(cli("ci", "status"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("build_output_dir")
+    parser.add_argument("--deployment", default="prod")
+    args = parser.parse_args()
+
+    # the CLI reads the URL from the environment, see the inputs of actions/utils/batch_deploy
+    os.environ["DAGSTER_CLOUD_URL"] = ci_context.get_dagster_cloud_url()
+    build_outputs = load_build_outputs(args.build_output_dir)
+    if not build_outputs:
+        print("No build outputs found, nothing to deploy", flush=True)
+        sys.exit(0)
+    batch_deploy(build_outputs, args.deployment)
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import List, Optional
+
+import action_cache
+
+"""
+Caches the branch deployment name for the current pull request, so that it is resolved once per
+commit instead of once per step or matrix job.
+
+Entries are keyed by the Dagster Cloud URL, repository, pull request number and head commit SHA,
+and stored in the shared action cache directory (see action_cache.py), which is visible to both
+composite and docker action steps. The branch deploy actions persist the directory with
+actions/cache, keyed by the workflow run, so later jobs and re-runs of the run reuse the name.
+
+The pull request status is not part of the key, so every caller finds the same entry. Callers that
+need to update the status of the branch deployment, ie deploy.sh for closed pull requests, do not
+read the cache.
+
+Usage:
+
+    # print the cached name, exit code 1 if there is none
+    python branch_deployment_cache.py get
+
+    # store a name
+    python branch_deployment_cache.py put <deployment-name>
+
+    # print the cached name, or run the command, cache and print the last line of its output
+    python branch_deployment_cache.py resolve -- dagster-cloud ci branch-deployment <project-dir>
+"""
+
+DEPLOYMENT_NAME_PATTERN = re.compile(r"^[0-9a-f]+$")
+
+
+def get_context() -> Optional[dict]:
+    """Returns the values identifying the current pull request, or None outside of one."""
+    if os.getenv("GITHUB_ACTIONS"):
+        repository = os.getenv("GITHUB_REPOSITORY")
+        pr_number = os.getenv("INPUT_PR") or _github_pr_number()
+        sha = _github_head_sha() or os.getenv("GITHUB_SHA")
+    elif os.getenv("GITLAB_CI"):
+        repository = os.getenv("CI_PROJECT_PATH")
+        pr_number = os.getenv("CI_MERGE_REQUEST_IID")
+        sha = os.getenv("CI_COMMIT_SHA")
+    else:
+        return None
+    if not (repository and pr_number and sha):
+        return None
+    return {
+        "url": os.getenv("DAGSTER_CLOUD_URL", ""),
+        "repository": repository,
+        "pr": str(pr_number),
+        "sha": sha,
+    }
+
+
+def _github_pr_number() -> Optional[str]:
+    match = re.match(r"refs/pull/(\d+)", os.getenv("GITHUB_REF", ""))
+    return match.group(1) if match else None
+
+
+def _github_head_sha() -> Optional[str]:
+    # for pull_request events GITHUB_SHA is the merge commit, the head commit is in the payload
+    event = action_cache.load_json(os.getenv("GITHUB_EVENT_PATH", ""), {})
+    return (event.get("pull_request") or {}).get("head", {}).get("sha")
+
+
+def _entry_path(context: dict) -> str:
+    key = hashlib.sha256(json.dumps(context, sort_keys=True).encode("utf-8")).hexdigest()
+    return os.path.join(action_cache.cache_dir("branch-deployments"), f"{key}.json")
+
+
+def get() -> Optional[str]:
+    context = get_context()
+    if not context:
+        return None
+    entry = action_cache.load_json(_entry_path(context))
+    return entry.get("deployment") if entry else None
+
+
+def put(deployment_name: str):
+    context = get_context()
+    if context and deployment_name:
+        action_cache.store_json(_entry_path(context), {**context, "deployment": deployment_name})
+
+
+def resolve(command: List[str]) -> Optional[str]:
+    name = get()
+    if name:
+        print(f"Using cached branch deployment {name}", file=sys.stderr)
+        return name
+    proc = subprocess.run(command, stdout=subprocess.PIPE, encoding="utf-8", check=False)
+    if proc.returncode:
+        sys.exit(proc.returncode)
+    # sometimes the cmd prints warnings in addition to the branch deployment name
+    names = [
+        line.strip()
+        for line in proc.stdout.splitlines()
+        if DEPLOYMENT_NAME_PATTERN.match(line.strip())
+    ]
+    if not names:
+        print(proc.stdout, end="", file=sys.stderr)
+        return None
+    put(names[-1])
+    return names[-1]
+
+
+def main(args: List[str]):
+    command, args = args[0], args[1:]
+    if command == "get":
+        name = get()
+    elif command == "put":
+        put(args[0])
+        return
+    elif command == "resolve":
+        if args[:1] == ["--"]:
+            args = args[1:]
+        name = resolve(args)
+    else:
+        print(f"Unknown command {command}", file=sys.stderr)
+        sys.exit(2)
+    if not name:
+        sys.exit(1)
+    print(name)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+# Picks the BuildKit cache-from and cache-to values for building a code location's image.
+#
+# With the gha backend, the cache is stored in the GitHub Actions cache, as before. With the
+# registry backend, the cache of each location is stored in the registry its image is pushed to,
+# under a tag per location and branch, so locations do not evict each other's cache. Builds read
+# the cache of their branch, then the cache of the default branch, and write the cache of their
+# branch.
+#
+# Usage:
+#   python build_cache.py --backend registry --registry <registry> --location <name>
+#     --branch <branch> --default-branch <branch>
+#
+# Writes the multiline `cache-from` and `cache-to` outputs to $GITHUB_OUTPUT.
+
+import argparse
+import os
+import re
+import uuid
+from typing import Dict, List
+
+# docker tags are limited to 128 characters
+MAX_TAG_LENGTH = 128
+
+
+def cache_tag(location: str, branch: str) -> str:
+    tag = re.sub(r"[^A-Za-z0-9_.-]", "-", f"cache-{location}-{branch}")
+    return tag[:MAX_TAG_LENGTH]
+
+
+def get_cache_settings(
+    backend: str, registry: str, location: str, branch: str, default_branch: str
+) -> Dict[str, List[str]]:
+    if backend == "gha":
+        return {"cache-from": ["type=gha"], "cache-to": ["type=gha,mode=max"]}
+    if backend != "registry":
+        raise ValueError(f"Unknown build cache backend {backend}, use gha or registry")
+
+    branch_ref = f"{registry}:{cache_tag(location, branch)}"
+    cache_from = [f"type=registry,ref={branch_ref}"]
+    if default_branch and default_branch != branch:
+        cache_from.append(f"type=registry,ref={registry}:{cache_tag(location, default_branch)}")
+    # ECR and other registries only accept cache exported as an OCI image manifest
+    cache_to = [f"type=registry,ref={branch_ref},mode=max,image-manifest=true,oci-mediatypes=true"]
+    return {"cache-from": cache_from, "cache-to": cache_to}
+
+
+def write_outputs(outputs: Dict[str, List[str]]):
+    with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+        for name, lines in outputs.items():
+            delimiter = f"EOF-{uuid.uuid4()}"
+            f.write(f"{name}<<{delimiter}\n" + "".join(f"{line}\n" for line in lines))
+            f.write(f"{delimiter}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="gha")
+    parser.add_argument("--registry", required=True)
+    parser.add_argument("--location", required=True)
+    parser.add_argument("--branch", required=True)
+    parser.add_argument("--default-branch", default="")
+    args = parser.parse_args()
+
+    outputs = get_cache_settings(
+        args.backend, args.registry, args.location, args.branch, args.default_branch
+    )
+    for name, lines in outputs.items():
+        print(f"{name}: {' '.join(lines)}")
+    write_outputs(outputs)
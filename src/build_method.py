@@ -0,0 +1,144 @@
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+
+import action_cache
+
+"""
+Picks the --build-method for deploy-python-executable.
+
+- ubuntu-20.04 and ubuntu-22.04 can always build pexes that work on our target platform
+- newer versions of ubuntu can only build pexes locally if there are no sdists (source only
+  packages), so the requirements are checked for sdists up front. When that check can't tell, eg
+  the dependencies are only declared in setup.py, docker is used. A local build that fails before
+  uploading is still retried in docker.
+
+The outcome of every local build attempt is recorded keyed by a hash of the dependency files, so
+later runs with the same dependencies skip both the sdist check and any failed local attempt.
+"""
+
+DEPENDENCY_FILES = ("requirements.txt", "setup.py", "setup.cfg", "pyproject.toml")
+LOCAL = "local"
+DOCKER = "docker"
+# renamed whenever older decisions can no longer be trusted, eg made by a broken sdist check
+DECISIONS_FILE = "decisions-v2.json"
+# glibc of the target platform, wheels built for this or any older glibc are compatible
+TARGET_GLIBC_MINOR = 28
+# manylinux2014, the most common wheel tag, is manylinux_2_17
+OLDEST_GLIBC_MINOR = 17
+
+
+@dataclass
+class BuildPlan:
+    method: str
+    # build method to retry with if the first one fails to build dependencies
+    fallback: Optional[str]
+    key: str
+    reason: str
+
+
+def dependency_key(build_dirs: List[str], python_version: str, root: str) -> str:
+    paths = [
+        os.path.join(build_dir, filename)
+        for build_dir in sorted(set(build_dirs))
+        for filename in DEPENDENCY_FILES
+    ]
+    return action_cache.hash_files(paths, python_version, platform.machine(), root=root)
+
+
+def plan(build_dirs: List[str], python_version: str, ubuntu_version: str, root: str) -> BuildPlan:
+    key = dependency_key(build_dirs, python_version, root)
+    if ubuntu_version in ("20.04", "22.04"):
+        return BuildPlan(LOCAL, None, key, f"ubuntu-{ubuntu_version} builds compatible pexes")
+
+    decision = load_decisions().get(key)
+    if decision:
+        return BuildPlan(decision, DOCKER if decision == LOCAL else None, key, "cached decision")
+
+    wheels_only = [has_only_wheels(build_dir, python_version) for build_dir in build_dirs]
+    if False in wheels_only:
+        return BuildPlan(DOCKER, None, key, "requirements include sdists")
+    if all(wheels_only):
+        return BuildPlan(LOCAL, DOCKER, key, "all requirements are available as wheels")
+    return BuildPlan(DOCKER, None, key, "could not check all requirements for sdists")
+
+
+def platform_args(machine: str) -> List[str]:
+    # pip only accepts wheels with exactly the given platform tags, not older compatible ones
+    tags = [f"manylinux2014_{machine}"] + [
+        f"manylinux_2_{minor}_{machine}"
+        for minor in range(OLDEST_GLIBC_MINOR, TARGET_GLIBC_MINOR + 1)
+    ]
+    return [f"--platform={tag}" for tag in tags]
+
+
+def has_only_wheels(build_dir: str, python_version: str) -> Optional[bool]:
+    """Checks whether requirements.txt resolves to wheels for the target platform.
+
+    Returns None if there is nothing to check, eg dependencies are only declared in setup.py,
+    or if pip is not available.
+    """
+    requirements_path = os.path.join(build_dir, "requirements.txt")
+    if not os.path.isfile(requirements_path):
+        return None
+    with tempfile.TemporaryDirectory() as target_dir:
+        try:
+            proc = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "pip",
+                    "install",
+                    "--dry-run",
+                    "--quiet",
+                    "--ignore-installed",
+                    "--only-binary=:all:",
+                    *platform_args(platform.machine()),
+                    f"--python-version={python_version}",
+                    "--implementation=cp",
+                    f"--target={target_dir}",
+                    "-r",
+                    requirements_path,
+                ],
+                cwd=build_dir,
+                capture_output=True,
+                encoding="utf-8",
+                check=False,
+            )
+        except OSError:
+            return None
+    if "No module named pip" in proc.stderr:
+        return None
+    return proc.returncode == 0
+
+
+def failed_before_upload(attempt: dict) -> bool:
+    """Whether a deploy attempt of deploy_timing.DeployTiming failed while building.
+
+    Relies on the exit status and the upload phase rather than on the error message, which may
+    not be in the output tail. A failure after the upload, eg the agent not loading the location,
+    would fail in docker as well.
+    """
+    if not attempt["returncode"]:
+        return False
+    locations = attempt["locations"].values()
+    return not locations or any("upload" not in phases for phases in locations)
+
+
+def decisions_path() -> str:
+    return os.path.join(action_cache.cache_dir("build-method"), DECISIONS_FILE)
+
+
+def load_decisions() -> dict:
+    return action_cache.load_json(decisions_path(), {})
+
+
+def record(key: str, method: str):
+    decisions = load_decisions()
+    if decisions.get(key) != method:
+        decisions[key] = method
+        action_cache.store_json(decisions_path(), decisions)
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+from typing import Dict, Optional
+
+import action_cache
+
+"""
+Collects the CI context shared by the action's scripts: the CI provider's metadata mapped onto a
+standard set of names, the Dagster Cloud URL, and the metadata of the current commit.
+
+The commit metadata is read with a single git invocation. The context is written to a JSON file
+in the shared action cache directory (see action_cache.py), keyed by the variables it is derived
+from, so later scripts and steps of the same job read the file instead of probing the environment
+and git again.
+
+Usage:
+
+    # print the context as JSON
+    python ci_context.py json
+
+    # print one value
+    python ci_context.py get commit_hash
+
+    # print `export NAME=value` lines, with upper case names, eg
+    eval "$(python ci_context.py shell)"
+"""
+
+# every variable the stored context is derived from. The Dagster Cloud URL is not stored, since
+# scripts export DAGSTER_CLOUD_URL after loading the context, which would change the key.
+SOURCE_ENV_VARS = (
+    "INPUT_PR",
+    "INPUT_PR_STATUS",
+    "GITHUB_ACTIONS",
+    "GITHUB_SERVER_URL",
+    "GITHUB_REPOSITORY",
+    "GITHUB_HEAD_REF",
+    "GITHUB_SHA",
+    "GITHUB_RUN_ID",
+    "GITHUB_RUN_NUMBER",
+    "GITHUB_RUN_ATTEMPT",
+    "GITHUB_JOB",
+    "GITLAB_CI",
+    "CI_PROJECT_URL",
+    "CI_PROJECT_NAME",
+    "CI_COMMIT_BRANCH",
+    "CI_COMMIT_SHORT_SHA",
+    "CI_MERGE_REQUEST_ID",
+    "CI_PIPELINE_URL",
+    "CI_JOB_ID",
+)
+
+# fields of `git log`, separated by NUL characters
+GIT_LOG_FIELDS = {"timestamp": "%cd", "message": "%s", "email": "%ae", "name": "%an"}
+
+
+def get_dagster_cloud_url() -> str:
+    # repeated in get_branch_deployment.sh and run.sh, which keep it in shell
+    if os.getenv("DAGSTER_CLOUD_URL"):
+        return os.environ["DAGSTER_CLOUD_URL"]
+    if os.getenv("INPUT_DAGSTER_CLOUD_URL"):
+        return os.environ["INPUT_DAGSTER_CLOUD_URL"]
+    return f"https://dagster.cloud/{os.getenv('INPUT_ORGANIZATION_ID', '')}"
+
+
+def get_provider_context() -> Dict[str, str]:
+    env = os.environ.get
+    if env("GITHUB_ACTIONS"):
+        repo_url = f"{env('GITHUB_SERVER_URL', '')}/{env('GITHUB_REPOSITORY', '')}"
+        return {
+            "provider": "github",
+            "branch_name": env("GITHUB_HEAD_REF", ""),
+            "branch_url": f"{repo_url}/tree/{env('GITHUB_HEAD_REF', '')}",
+            "ci_run_number": env("GITHUB_RUN_NUMBER", ""),
+            "commit_hash": env("GITHUB_SHA", ""),
+            "commit_url": f"{repo_url}/tree/{env('GITHUB_SHA', '')}",
+            "git_repo": env("GITHUB_REPOSITORY", ""),
+            "pr_id": env("INPUT_PR", ""),
+            "pr_status": env("INPUT_PR_STATUS", "").upper(),
+            "pr_url": f"{repo_url}/pull/{env('INPUT_PR', '')}",
+            "run_url": f"{repo_url}/actions/runs/{env('GITHUB_RUN_ID', '')}",
+        }
+    if env("GITLAB_CI"):
+        project_url = env("CI_PROJECT_URL", "")
+        return {
+            "provider": "gitlab",
+            "branch_name": env("CI_COMMIT_BRANCH", ""),
+            "branch_url": f"{project_url}/-/tree/{env('CI_COMMIT_BRANCH', '')}",
+            "ci_run_number": "",
+            "commit_hash": env("CI_COMMIT_SHORT_SHA", ""),
+            "commit_url": f"{project_url}/-/commit/{env('CI_COMMIT_SHORT_SHA', '')}",
+            "git_repo": env("CI_PROJECT_NAME", ""),
+            "pr_id": env("CI_MERGE_REQUEST_ID", ""),
+            "pr_status": "",
+            "pr_url": f"{project_url}/-/merge_requests/{env('CI_MERGE_REQUEST_ID', '')}",
+            "run_url": env("CI_PIPELINE_URL", ""),
+        }
+    return {"provider": ""}
+
+
+def get_commit_context() -> Dict[str, str]:
+    """Returns the metadata of the HEAD commit, with empty values outside of a git repository."""
+    try:
+        output = subprocess.check_output(
+            [
+                "git",
+                # the checkout may be owned by another user, eg when mounted in a container
+                "-c",
+                "safe.directory=*",
+                "log",
+                "-1",
+                "--date=unix",
+                "--format=" + "%x00".join(GIT_LOG_FIELDS.values()),
+            ],
+            encoding="utf-8",
+            stderr=subprocess.DEVNULL,
+        )
+        values = output.rstrip("\n").split("\0")
+    except (OSError, subprocess.CalledProcessError):
+        values = []
+    if len(values) != len(GIT_LOG_FIELDS):
+        values = [""] * len(GIT_LOG_FIELDS)
+    return dict(zip(GIT_LOG_FIELDS, values))
+
+
+def collect() -> Dict[str, str]:
+    return {**get_provider_context(), **get_commit_context()}
+
+
+def get_context_path() -> str:
+    digest = hashlib.sha256(os.getcwd().encode("utf-8"))
+    for name in SOURCE_ENV_VARS:
+        digest.update(f"\0{name}={os.getenv(name, '')}".encode("utf-8"))
+    return os.path.join(action_cache.cache_dir("ci-context"), digest.hexdigest()[:32] + ".json")
+
+
+def load() -> Dict[str, str]:
+    """Returns the context written earlier for the same variables, or collects and writes it."""
+    path = get_context_path()
+    context: Optional[Dict[str, str]] = action_cache.load_json(path)
+    if context is None:
+        context = collect()
+        action_cache.store_json(path, context)
+    return {**context, "dagster_cloud_url": get_dagster_cloud_url()}
+
+
+def to_shell(context: Dict[str, str]) -> str:
+    return "".join(f"export {key.upper()}={shlex.quote(value)}\n" for key, value in context.items())
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "json"
+    context = load()
+    if command == "json":
+        print(json.dumps(context, indent=2))
+    elif command == "get" and len(sys.argv) == 3:
+        print(context.get(sys.argv[2], ""))
+    elif command == "shell":
+        print(to_shell(context), end="")
+    else:
+        print("Usage: ci_context.py json|shell|get <key>", file=sys.stderr)
+        sys.exit(2)
@@ -0,0 +1,12 @@
+#!/bin/bash -
+
+# This maps CI provider (Github, Gitlab) env vars onto a
+# standardized set of env vars, see ci_context.py:
+# BRANCH_NAME BRANCH_URL CI_RUN_NUMBER COMMIT_HASH COMMIT_URL GIT_REPO PR_ID PR_STATUS PR_URL RUN_URL
+# It also exports DAGSTER_CLOUD_URL and the HEAD commit's TIMESTAMP MESSAGE EMAIL NAME
+eval "$(python /ci_context.py shell)"
+
+if [ -z $PROVIDER ]; then
+  echo "::error title=Running in an unsupported CI environment. Use Github Actions, Gitlab Pipelines, or script against the dagster-cloud CLI directly."
+  exit 1
+fi
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+
+# Runs dagster-cloud and dg CLI commands in a long-lived worker started from the action's PEX.
+#
+# Importing dagster and dagster_cloud_cli takes seconds, and a workflow runs the CLI many times.
+# The worker imports the CLI modules once and forks a child for each command, so every command
+# starts with the modules already imported but with its own process state. Commands are sent
+# over a Unix socket by the thin client below, together with the client's stdin, stdout and
+# stderr, its working directory and its environment.
+#
+#   python cli_worker.py start   # starts the worker, exports DAGSTER_CLOUD_CLI_SOCKET
+#   python cli_worker.py run -m dagster_cloud_cli.entrypoint ci status
+#   python cli_worker.py stop
+#
+# `run` executes the PEX directly when no worker is running, so action steps can always use it.
+# Note that the environment is applied after the modules are imported, so settings that the CLI
+# reads at import time come from the environment of the `start` step.
+
+import importlib
+import json
+import os
+import platform
+import runpy
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+import traceback
+from pathlib import Path
+
+_ARCH = "aarch64" if platform.machine() == "aarch64" else "x86_64"
+DAGSTER_CLOUD_PEX_PATH = Path(__file__).parent.parent / f"generated/gha/dagster-cloud-{_ARCH}.pex"
+SOCKET_ENV_VAR = "DAGSTER_CLOUD_CLI_SOCKET"
+PRELOAD_MODULES = ["dagster_cloud_cli.entrypoint", "dagster_dg_cli.cli.entrypoint"]
+# the worker exits after this many seconds without commands
+IDLE_TIMEOUT = 60 * 60
+START_TIMEOUT = 120
+
+
+def get_pex_path() -> str:
+    return os.getenv("DAGSTER_CLOUD_PEX") or str(DAGSTER_CLOUD_PEX_PATH)
+
+
+def get_socket_path() -> str:
+    run_id = os.getenv("GITHUB_RUN_ID", "0")
+    return os.path.join(os.getenv("RUNNER_TEMP", "/tmp"), f"dagster-cloud-cli-{run_id}.sock")
+
+
+def send_message(conn: socket.socket, message: dict, fds=()):
+    data = json.dumps(message).encode("utf-8")
+    data = struct.pack("!I", len(data)) + data
+    if fds:
+        sent = socket.send_fds(conn, [data], list(fds))
+        conn.sendall(data[sent:])
+    else:
+        conn.sendall(data)
+
+
+def receive_message(conn: socket.socket, max_fds: int = 0):
+    """Returns the next message and any file descriptors sent with it, or None at end of stream."""
+    # read exactly one message, the next one may already be buffered
+    if max_fds:
+        header, fds, _, _ = socket.recv_fds(conn, 4, max_fds)
+    else:
+        header, fds = conn.recv(4), []
+    header = receive_exactly(conn, header, 4)
+    if header is None:
+        return None, fds
+    (size,) = struct.unpack("!I", header)
+    data = receive_exactly(conn, b"", size)
+    if data is None:
+        return None, fds
+    return json.loads(data.decode("utf-8")), fds
+
+
+def receive_exactly(conn: socket.socket, data: bytes, size: int):
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+# Worker
+
+
+def serve(socket_path: str):
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as err:
+            print(f"Not preloading {module}: {err}", flush=True)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    server.listen()
+    server.settimeout(IDLE_TIMEOUT)
+    # children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # `stop` sends SIGTERM, exit through the finally block to remove the socket
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: sys.exit(0))
+    print(f"Serving CLI commands on {socket_path}", flush=True)
+
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                print("Exiting after being idle", flush=True)
+                return
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                server.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                try:
+                    handle(conn)
+                finally:
+                    os._exit(0)
+            conn.close()
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def handle(conn: socket.socket):
+    request, fds = receive_message(conn, max_fds=3)
+    if not request:
+        return
+    if request.get("command") == "stop":
+        os.kill(os.getppid(), signal.SIGTERM)
+        return
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.argv = [request["module"], *request["args"]]
+    send_message(conn, {"pid": os.getpid()})
+
+    returncode = run_module(request["module"])
+    sys.stdout.flush()
+    sys.stderr.flush()
+    send_message(conn, {"returncode": returncode})
+
+
+def run_module(module: str) -> int:
+    try:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as err:
+        if err.code is None or isinstance(err.code, int):
+            return err.code or 0
+        print(err.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def start():
+    socket_path = get_socket_path()
+    log_path = socket_path + ".log"
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(
+            [get_pex_path(), os.path.abspath(__file__), "serve", socket_path],
+            env={**os.environ, "PEX_INTERPRETER": "1"},
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    start_time = time.monotonic()
+    while not is_serving(socket_path):
+        if proc.poll() is not None or time.monotonic() - start_time > START_TIMEOUT:
+            with open(log_path, encoding="utf-8") as f:
+                print(f.read(), end="")
+            print("Could not start the CLI worker, commands will run the PEX directly", flush=True)
+            return
+        time.sleep(0.1)
+    print(f"Started CLI worker in {time.monotonic() - start_time:.1f}s", flush=True)
+
+    github_env = os.getenv("GITHUB_ENV")
+    if github_env:
+        with open(github_env, "a", encoding="utf-8") as f:
+            f.write(f"{SOCKET_ENV_VAR}={socket_path}\n")
+
+
+def stop():
+    socket_path = os.getenv(SOCKET_ENV_VAR)
+    conn = connect(socket_path) if socket_path else None
+    if conn:
+        with conn:
+            send_message(conn, {"command": "stop"})
+
+
+def is_serving(socket_path: str) -> bool:
+    conn = connect(socket_path)
+    if conn:
+        conn.close()
+    return bool(conn)
+
+
+# Client
+
+
+def connect(socket_path: str):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        conn.close()
+        return None
+    return conn
+
+
+def run(module: str, args):
+    socket_path = os.getenv(SOCKET_ENV_VAR)
+    conn = connect(socket_path) if socket_path else None
+    if not conn:
+        pex_path = get_pex_path()
+        os.execv(pex_path, [pex_path, "-m", module, *args])
+
+    with conn:
+        request = {
+            "module": module,
+            "args": list(args),
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+        send_message(conn, request, fds=[0, 1, 2])
+        reply, _ = receive_message(conn)
+        if not reply:
+            print("CLI worker closed the connection", file=sys.stderr)
+            sys.exit(1)
+
+        def forward(signum, _frame):
+            os.kill(reply["pid"], signum)
+
+        signal.signal(signal.SIGINT, forward)
+        signal.signal(signal.SIGTERM, forward)
+        reply, _ = receive_message(conn)
+        sys.exit(reply["returncode"] if reply else 1)
+
+
+def main():
+    command, args = sys.argv[1], sys.argv[2:]
+    if command == "run":
+        if args[:1] != ["-m"] or len(args) < 2:
+            print("Usage: cli_worker.py run -m <module> [args...]", file=sys.stderr)
+            sys.exit(2)
+        run(args[1], args[2:])
+    elif command == "start":
+        start()
+    elif command == "stop":
+        stop()
+    elif command == "serve":
+        serve(args[0])
+    else:
+        print(f"Unknown command {command}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,11 @@
 #!/bin/bash -
 
-if [ -z $CUSTOM_BASE_IMAGE_ALLOWED ] || [ -z $INPUT_BASE_IMAGE ]; then
-    if [ ! -z $INPUT_BASE_IMAGE ]; then
-        echo "Custom base images are not enabled for this organization, defaulting to python:3.8-slim."
-    fi
-    echo "FROM python:3.8-slim" > ${INPUT_TARGET_DIRECTORY}/Dockerfile
-else
-    echo "FROM ${INPUT_BASE_IMAGE}" > ${INPUT_TARGET_DIRECTORY}/Dockerfile
+# Generates the Dockerfile of the code location, see generate_dockerfile.py
+ARGS=()
+if [ "${INPUT_MULTI_STAGE}" == "true" ]; then
+    ARGS+=("--multi-stage")
 fi
-
-
-cat $(python /expand_env_vars.py) >> ${INPUT_TARGET_DIRECTORY}/Dockerfile
-cat /Dockerfile.template >> ${INPUT_TARGET_DIRECTORY}/Dockerfile
+if [ -n "${INPUT_SHARED_BASE_IMAGE}" ]; then
+    ARGS+=("--shared-base-image=${INPUT_SHARED_BASE_IMAGE}" "--registry=${INPUT_REGISTRY}")
+fi
+exec python /generate_dockerfile.py "${INPUT_TARGET_DIRECTORY}" "${ARGS[@]}"
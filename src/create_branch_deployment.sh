@@ -0,0 +1,59 @@
+#!/bin/bash -
+
+# Creates or updates the branch deployment for the current pull request, and prints its name.
+#
+# Workflows that deploy each location in a separate job run this once in a setup job, and pass
+# the name to the deploy action of each job with the `deployment` input. Otherwise deploy.sh
+# runs this for each location.
+
+source /ci_env.sh
+
+if [ ! -z $GITHUB_ACTIONS ]; then
+  AVATAR_URL=$(python /fetch_github_avatar.py "$EMAIL")
+fi
+
+# Create or update branch deployment
+if [ -z $AVATAR_URL ]; then
+    export DEPLOYMENT_NAME=$(dagster-cloud branch-deployment create-or-update \
+        --url "${DAGSTER_CLOUD_URL}" \
+        --api-token "$DAGSTER_CLOUD_API_TOKEN" \
+        --git-repo-name "$GIT_REPO" \
+        --branch-name "$BRANCH_NAME" \
+        --branch-url "$BRANCH_URL" \
+        --pull-request-url "$PR_URL" \
+        --pull-request-id "$PR_ID" \
+        --pull-request-status "$PR_STATUS" \
+        --commit-hash "$COMMIT_HASH" \
+        --timestamp "$TIMESTAMP" \
+        --commit-message "$MESSAGE" \
+        --author-name "$NAME" \
+        --author-email "$EMAIL")
+else
+    export DEPLOYMENT_NAME=$(dagster-cloud branch-deployment create-or-update \
+        --url "${DAGSTER_CLOUD_URL}" \
+        --api-token "$DAGSTER_CLOUD_API_TOKEN" \
+        --git-repo-name "$GIT_REPO" \
+        --branch-name "$BRANCH_NAME" \
+        --branch-url "$BRANCH_URL" \
+        --pull-request-url "$PR_URL" \
+        --pull-request-id "$PR_ID" \
+        --pull-request-status "$PR_STATUS" \
+        --commit-hash "$COMMIT_HASH" \
+        --timestamp "$TIMESTAMP" \
+        --commit-message "$MESSAGE" \
+        --author-name "$NAME" \
+        --author-email "$EMAIL" \
+        --author-avatar-url "$AVATAR_URL")
+fi
+
+python /branch_deployment_cache.py put "$DEPLOYMENT_NAME"
+
+if [ -z $DEPLOYMENT_NAME ]; then
+    echo "::error title=Failed to update branch deployment::Failed to update branch deployment" >&2
+    exit 1
+fi
+
+if [ ! -z $GITHUB_OUTPUT ]; then
+    echo "deployment=${DEPLOYMENT_NAME}" >> ${GITHUB_OUTPUT}
+fi
+echo "${DEPLOYMENT_NAME}"
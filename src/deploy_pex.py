@@ -1,27 +1,33 @@
 #!/usr/bin/env python
 
-# Switches PEX deploy behavior based on github runner's ubuntu version
+# Switches PEX deploy behavior based on github runner's ubuntu version and the project's dependencies
 # - ubuntu-22.04 can always build pexes that work on our target platform
 # - newer versions of ubuntu can only build pexes if there are no sdists (source only packages)
 
-# On ubuntu-22.04: forward args to `dagster-cloud --build-method=local`
-# On anything else: forward args to `dagster-cloud --build-method=docker` to ensure they are built in a compatible environment
+# The build method is picked by build_method.plan(): `--build-method=local` when that is safe,
+# otherwise `--build-method=docker` to ensure they are built in a compatible environment. A local
+# build that fails before uploading is retried in docker.
 
 import os
 import platform
 import re
-import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-import yaml
+import branch_deployment_cache
+import build_method as build_method_planner
+import deploy_timing
+import deps_cache
+import pr_comment
+import workspace
+from stream_output import FirstMatch, run
 
 _ARCH = "aarch64" if platform.machine() == "aarch64" else "x86_64"
 DAGSTER_CLOUD_PEX_PATH = (
     Path(__file__).parent.parent / f"generated/gha/dagster-cloud-{_ARCH}.pex"
 )
-UPDATE_COMMENT_SCRIPT_PATH = Path(__file__).parent / "create_or_update_comment.py"
 
 
 def main():
@@ -37,18 +43,67 @@ def main():
         deployment_name = os.getenv("INPUT_DEPLOYMENT", "prod")
         print(f"Deploying to a full deployment: {deployment_name}", flush=True)
 
+    # INPUT_MAX_PARALLEL_DEPLOYS > 0 deploys each location separately using that many workers
+    max_parallel_deploys = int(os.getenv("INPUT_MAX_PARALLEL_DEPLOYS") or 0)
+
     ubuntu_version = get_runner_ubuntu_version()
     print("Running on Ubuntu", ubuntu_version, flush=True)
-    if ubuntu_version == "22.04" or ubuntu_version == "20.04":
-        returncode, output = deploy_pex(args, deployment_name, build_method="local")
-    else:
-        returncode, output = deploy_pex(args, deployment_name, build_method="docker")
+    dagster_cloud_yaml = args[0]
+    plan = build_method_planner.plan(
+        get_location_directories(dagster_cloud_yaml),
+        get_python_version(args),
+        ubuntu_version,
+        root=os.path.dirname(os.path.abspath(dagster_cloud_yaml)),
+    )
+    print(f"Using build method {plan.method}: {plan.reason}", flush=True)
+
+    timing = deploy_timing.DeployTiming()
+    build_method = plan.method
+    returncode, _, statuses = deploy_pex(
+        list(args),
+        deployment_name,
+        build_method=build_method,
+        max_parallel_deploys=max_parallel_deploys,
+        timing=timing,
+    )
+    if plan.fallback and build_method_planner.failed_before_upload(timing.attempts[-1]):
+        # locations deployed separately may have succeeded, only the others are deployed again
+        failed = [name for name, status in statuses.items() if status != "success"]
+        print(
+            f"Failed to build {', '.join(failed)} with build method {build_method},"
+            f" retrying with {plan.fallback}",
+            flush=True,
+        )
+        build_method = plan.fallback
+        returncode, _, statuses = deploy_pex(
+            list(args),
+            deployment_name,
+            build_method=build_method,
+            max_parallel_deploys=max_parallel_deploys,
+            timing=timing,
+            statuses=statuses,
+        )
+    write_timing_report(timing)
     if returncode:
         print(
             "::error Title=Deploy failed::Failed to deploy Python Executable. "
         )
-        # TODO: fallback to docker deploy here
         sys.exit(1)
+    # a docker build picked by the sdist check says nothing about whether a local one would work
+    if plan.method == build_method_planner.LOCAL:
+        build_method_planner.record(plan.key, build_method)
+
+
+def write_timing_report(timing: deploy_timing.DeployTiming):
+    # INPUT_TIMING_REPORT_PATH is the `timing_report_path:` input value in action.yml
+    report_path = os.getenv("INPUT_TIMING_REPORT_PATH") or os.path.join(
+        os.getenv("RUNNER_TEMP", "/tmp"), "dagster-deploy-timing.json"
+    )
+    timing.write_json(report_path)
+    timing.write_step_summary()
+    if os.getenv("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write(f"timing_report={report_path}\n")
 
 
 def get_runner_ubuntu_version():
@@ -65,29 +120,31 @@ def get_runner_ubuntu_version():
 
 
 def get_locations(dagster_cloud_file) -> List[str]:
-    with open(dagster_cloud_file) as f:
-        workspace_contents = f.read()
-    workspace_contents_yaml = yaml.safe_load(workspace_contents)
+    return [location.name for location in workspace.load_locations(dagster_cloud_file)]
+
 
-    return [location["location_name"] for location in workspace_contents_yaml["locations"]]
+def get_location_directories(dagster_cloud_file) -> List[str]:
+    return [
+        workspace.get_location_directory(dagster_cloud_file, location)
+        for location in workspace.load_locations(dagster_cloud_file)
+    ]
 
 
-def run(args):
-    # Prints streaming output and also captures and returns it
-    print("Running", args, flush=True)
-    popen = subprocess.Popen(
-        args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, encoding="utf-8"
-    )
-    output = []
-    for line in iter(popen.stdout.readline, ""):
-        print(line, end="", flush=True)
-        output.append(line)
-    popen.stdout.close()
-    returncode = popen.wait()
-    return returncode, output
+def get_python_version(args) -> str:
+    for arg in args:
+        if arg.startswith("--python-version="):
+            return arg.split("=", 1)[1]
+    return "3.8"
 
 
 def get_branch_deployment_name(project_dir):
+    name = branch_deployment_cache.get()
+    if name:
+        print("Deploying to cached branch deployment:", name, flush=True)
+        return name
+
+    # sometimes the cmd prints warnings in addition to the branch deployment name
+    branch_deployment = FirstMatch("[0-9a-f]+")
     returncode, output = run(
         [
             str(DAGSTER_CLOUD_PEX_PATH),
@@ -96,24 +153,33 @@ def get_branch_deployment_name(project_dir):
             "ci",
             "branch-deployment",
             project_dir,
-        ]
+        ],
+        matcher=branch_deployment,
     )
-    if returncode:
+    if returncode or not branch_deployment.value:
         print("Could not determine branch deployment from output:", output, flush=True)
         sys.exit(1)
-    for line in output:
-        # sometimes the cmd prints warnings in addition to the branch deployment name
-        if re.match('[0-9a-f]+', line):
-            name = line.strip()
-            break
-    else:
-        print("Could not determine branch deployment from output: ", output, flush=True)
-        sys.exit(1)
+    name = branch_deployment.value
+    branch_deployment_cache.put(name)
     print("Deploying to branch deployment:", name, flush=True)
     return name
 
 
-def deploy_pex(args, branch_deployment_name: Optional[str], build_method: str):
+def deploy_pex(
+    args,
+    branch_deployment_name: Optional[str],
+    build_method: str,
+    max_parallel_deploys: int = 0,
+    timing: Optional[deploy_timing.DeployTiming] = None,
+    statuses: Optional[Dict[str, str]] = None,
+):
+    """Deploys the locations of the dagster_cloud.yaml passed as the first argument.
+
+    When statuses of an earlier attempt are passed, only the locations that did not succeed are
+    deployed. Returns the exit code, the output tail of the failed deploys and the new statuses.
+    """
+    timing = timing or deploy_timing.DeployTiming()
+    timing.start_attempt(build_method)
     dagster_cloud_yaml = args.pop(0)
     args.insert(0, os.path.dirname(dagster_cloud_yaml))
     args = args + [f"--build-method={build_method}"]
@@ -124,79 +190,139 @@ def deploy_pex(args, branch_deployment_name: Optional[str], build_method: str):
     deployment_name = branch_deployment_name if branch_deployment_name else "prod"
     deployment_flag = f"--url={os.getenv('DAGSTER_CLOUD_URL')}/{deployment_name}"
     locations = get_locations(dagster_cloud_yaml)
+    location_directories = dict(zip(locations, get_location_directories(dagster_cloud_yaml)))
+    python_version = get_python_version(args)
+    # INPUT_FORCE_REBUILD_DEPS is the `force_rebuild_deps:` input value in action.yml
+    use_deps_cache = os.getenv("INPUT_FORCE_REBUILD_DEPS") != "true"
     # give first deploy extra time to spin up agent
     agent_heartbeat_timeout = 600 if (os.getenv("GITHUB_RUN_NUMBER") == "1") else 90
     timeout_args = [
         "--location-load-timeout=3600",
         f"--agent-heartbeat-timeout={agent_heartbeat_timeout}",
     ]
-    notify(branch_deployment_name, locations, "pending")
-
-    returncode, output = run(
-        [
+    comment = None
+    if branch_deployment_name:
+        comment = pr_comment.PullRequestComment.from_env(get_pr_number())
+    statuses = dict(statuses or {})
+    pending_locations = [name for name in locations if statuses.get(name) != "success"]
+    # the pending update runs in the background while the deploy starts
+    statuses.update({location_name: "pending" for location_name in pending_locations})
+    notify(comment, branch_deployment_name, statuses, wait=False)
+
+    def deploy_command(location_name: str) -> List[str]:
+        build_dirs = (
+            list(location_directories.values())
+            if location_name == "*"
+            else [location_directories[location_name]]
+        )
+        deps_cache_flags = deps_cache.cache_flags(
+            deps_cache.cache_tag(os.getenv("GITHUB_REPOSITORY", ""), build_dirs, python_version),
+            use_cache=use_deps_cache,
+        )
+        return [
             str(DAGSTER_CLOUD_PEX_PATH),
             "-m",
             "dagster_cloud_cli.entrypoint",
             "serverless",
             "deploy-python-executable",
             *args,
-            "--location-name=*",
+            f"--location-name={location_name}",
             f"--location-file={dagster_cloud_yaml}",
             f"--git-url={git_url}",
             f"--commit-hash={commit_hash}",
             deployment_flag,
             *timeout_args,
+            *deps_cache_flags,
         ]
-    )
-    # TODO: status update should be per location, but this is not reported by the deploy command yet
-    if returncode:
-        notify(branch_deployment_name, locations, "failed")
-    else:
-        notify(branch_deployment_name, locations, "success")
-    return returncode, output
 
+    if max_parallel_deploys or pending_locations != locations:
+        returncode, output = deploy_locations_concurrently(
+            pending_locations,
+            deploy_command,
+            max_parallel_deploys or 1,
+            lambda: notify(comment, branch_deployment_name, statuses, wait=False),
+            statuses,
+            timing,
+        )
+    else:
+        returncode, output = run_timed(deploy_command("*"), locations, timing)
+        # the combined deploy command does not report status per location
+        action = "failed" if returncode else "success"
+        statuses = {location_name: action for location_name in locations}
+    notify(comment, branch_deployment_name, statuses)
+    return returncode, output, statuses
+
+
+def deploy_locations_concurrently(
+    locations: List[str],
+    deploy_command,
+    max_workers: int,
+    on_status_change,
+    statuses: Dict[str, str],
+    timing: deploy_timing.DeployTiming,
+):
+    # Runs one deploy per location, so each location gets its own status and a slow or broken
+    # location does not hold up or fail the others. Updates statuses in place.
+    print(
+        f"Deploying {len(locations)} locations with up to {max_workers} concurrent deploys",
+        flush=True,
+    )
+    output = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                run_timed,
+                deploy_command(location_name),
+                [location_name],
+                timing,
+                f"[{location_name}] ",
+            ): location_name
+            for location_name in locations
+        }
+        for future in as_completed(futures):
+            location_name = futures[future]
+            try:
+                location_returncode, location_output = future.result()
+            except OSError as err:
+                # eg the pex is missing, which fails this location without stopping the others
+                print(f"[{location_name}] Failed to run deploy: {err}", flush=True)
+                location_returncode, location_output = 1, [f"{err}\n"]
+            statuses[location_name] = "failed" if location_returncode else "success"
+            if location_returncode:
+                output.extend(location_output)
+            on_status_change()
 
-def notify(deployment_name: Optional[str], locations: List[str], action: str):
-    if deployment_name is None:
-        return
     for location_name in locations:
-        update_pr_comment(deployment_name, location_name, action)
-
+        print(f"{location_name}: {statuses[location_name]}", flush=True)
+    failed = [name for name in locations if statuses[name] == "failed"]
+    if failed:
+        print(f"::error title=Deploy failed::Failed to deploy {', '.join(failed)}", flush=True)
+    return int(bool(failed)), output
+
+
+def run_timed(
+    command: List[str],
+    location_names: List[str],
+    timing: deploy_timing.DeployTiming,
+    prefix: str = "",
+):
+    timer = deploy_timing.PhaseTimer(location_names)
+    returncode, output = run(command, prefix, matcher=timer)
+    timer.finish(returncode)
+    timing.record(timer)
+    return returncode, output
 
-def update_pr_comment(deployment_name: str, location_name: str, action: str):
-    # action is one of "pending", "success", "failed"
-    pr_id = get_pr_number()
-    if not pr_id:
-        print("Not in a pull request, will not post PR comment", flush=True)
-        return
 
-    if not UPDATE_COMMENT_SCRIPT_PATH.exists:
-        print("Could not find script_path, will not post PR comment", flush=True)
+def notify(
+    comment: Optional[pr_comment.PullRequestComment],
+    deployment_name: Optional[str],
+    statuses: Dict[str, str],
+    wait: bool = True,
+):
+    # statuses maps location name to one of "pending", "success", "failed"
+    if deployment_name is None or comment is None:
         return
-
-    env = dict(os.environ)
-    github_run_url = f'{os.environ["GITHUB_SERVER_URL"]}/{os.environ["GITHUB_REPOSITORY"]}/actions/runs/{os.environ["GITHUB_RUN_ID"]}'
-    env.update(
-        {
-            "INPUT_PR": str(pr_id),
-            "INPUT_ACTION": action,
-            "INPUT_DEPLOYMENT": deployment_name,
-            "INPUT_LOCATION_NAME": location_name,
-            "GITHUB_RUN_URL": github_run_url,
-        }
-    )
-    env = {name: value for name, value in env.items() if value is not None}
-    proc = subprocess.run(
-        [str(DAGSTER_CLOUD_PEX_PATH), str(UPDATE_COMMENT_SCRIPT_PATH)],
-        env=env,
-        check=False,
-    )
-
-    if proc.returncode:
-        print(
-            f"Ignoring failure to update PR comment: {proc.stdout}\n{proc.stderr}",
-            flush=True,
-        )
+    comment.update(deployment_name, statuses, wait)
 
 
 def get_pr_number():
@@ -0,0 +1,138 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+"""
+Splits the streamed output of `dagster-cloud serverless deploy-python-executable` into timed
+phases, and reports them as JSON and as a table in the GitHub step summary.
+
+Phases are detected from the messages the CLI prints when it starts each step. The CLI does not
+print anything when the agent starts heartbeating, so waiting for the agent and loading the
+location are reported as a single wait_for_agent phase.
+"""
+
+# (phase, pattern) - a phase lasts until the next phase starts or the command exits
+PHASE_MARKERS = [
+    ("resolve_dependencies", re.compile(r"Building Python executable for (?P<location>\S+)")),
+    (
+        "build_dependencies",
+        re.compile(r"No published deps\.pex found|Building project dependencies in a docker"),
+    ),
+    ("build_source", re.compile(r"Wrote deps pex|Found published deps\.pex")),
+    ("upload", re.compile(r"Uploading Python executable for")),
+    ("wait_for_agent", re.compile(r"Waiting for agent to sync changes")),
+    ("done", re.compile(r"Agent synced changes|Added or updated locations")),
+]
+# phases that apply to all locations of the command, rather than the location being built
+SHARED_PHASES = {"startup", "wait_for_agent", "done"}
+
+
+class PhaseTimer:
+    """A stream_output matcher that timestamps the phases of one deploy command."""
+
+    def __init__(self, location_names: List[str]):
+        self.location_names = location_names
+        self._start = time.monotonic()
+        # (seconds since start, phase, location name or None for shared phases)
+        self.events = [(0.0, "startup", None)]
+        self.returncode: Optional[int] = None
+        self.duration: Optional[float] = None
+        self._location = location_names[0] if len(location_names) == 1 else None
+
+    def __call__(self, line: str):
+        for phase, pattern in PHASE_MARKERS:
+            match = pattern.search(line)
+            if match:
+                if phase == "resolve_dependencies":
+                    self._location = match.group("location")
+                location = None if phase in SHARED_PHASES else self._location
+                self.events.append((time.monotonic() - self._start, phase, location))
+                return
+
+    def finish(self, returncode: int):
+        self.returncode = returncode
+        self.duration = time.monotonic() - self._start
+
+    def location_phases(self) -> Dict[str, Dict[str, float]]:
+        """Returns the seconds spent in each phase, per location."""
+        phases = {name: {} for name in self.location_names}
+        end = self.duration if self.duration is not None else time.monotonic() - self._start
+        for index, (offset, phase, location) in enumerate(self.events):
+            if phase == "done":
+                continue
+            next_offset = self.events[index + 1][0] if index + 1 < len(self.events) else end
+            for name in [location] if location else self.location_names:
+                if name in phases:
+                    phases[name][phase] = phases[name].get(phase, 0.0) + next_offset - offset
+        return phases
+
+
+class DeployTiming:
+    """Collects the phase timers of all deploy commands run by deploy_pex."""
+
+    def __init__(self):
+        self.attempts: List[dict] = []
+        self._attempt_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def start_attempt(self, build_method: str):
+        self._attempt_start = time.monotonic()
+        self.attempts.append(
+            {
+                "build_method": build_method,
+                "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "duration": 0.0,
+                "returncode": 0,
+                "locations": {},
+            }
+        )
+
+    def record(self, timer: PhaseTimer):
+        """Adds the phases of a finished command to the current attempt."""
+        with self._lock:
+            attempt = self.attempts[-1]
+            attempt["duration"] = round(time.monotonic() - self._attempt_start, 3)
+            attempt["returncode"] = attempt["returncode"] or timer.returncode
+            for name, phases in timer.location_phases().items():
+                attempt["locations"][name] = {
+                    phase: round(seconds, 3) for phase, seconds in phases.items()
+                }
+
+    def report(self) -> dict:
+        return {"attempts": self.attempts}
+
+    def write_json(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Wrote deploy timing report to {path}", flush=True)
+
+    def markdown(self) -> str:
+        phase_names = ["startup"] + [phase for phase, _ in PHASE_MARKERS if phase != "done"]
+        lines = ["### Dagster Cloud deploy timing", ""]
+        for attempt in self.attempts:
+            status = "failed" if attempt["returncode"] else "succeeded"
+            lines.append(
+                f"Build method `{attempt['build_method']}` {status} in"
+                f" {attempt['duration']:.1f}s"
+            )
+            lines.append("")
+            lines.append("| Location | " + " | ".join(phase_names) + " |")
+            lines.append("| --- |" + " ---: |" * len(phase_names))
+            for name, phases in sorted(attempt["locations"].items()):
+                cells = [
+                    f"{phases[phase]:.1f}s" if phase in phases else "-" for phase in phase_names
+                ]
+                lines.append(f"| `{name}` | " + " | ".join(cells) + " |")
+            lines.append("")
+        return "\n".join(lines)
+
+    def write_step_summary(self):
+        summary_path = os.getenv("GITHUB_STEP_SUMMARY")
+        if summary_path and self.attempts:
+            with open(summary_path, "a", encoding="utf-8") as f:
+                f.write(self.markdown() + "\n")
@@ -0,0 +1,46 @@
+import os
+import platform
+from typing import List
+
+import action_cache
+
+"""
+Picks the --deps-cache-to and --deps-cache-from tags for deploy-python-executable.
+
+The dependencies pex is published under a tag derived from a hash of the dependency files, rather
+than a per branch or per repository tag, so any branch with the same dependencies reuses it,
+including the first pipeline of a new branch.
+
+The CLI only reuses a cached dependencies pex when its requirements match, and accepts a single
+--deps-cache-from tag. A branch or default branch tag can therefore only hit when the same
+dependencies were published, in which case the dependency hash tag hits as well, so there is no
+fallback to other tags.
+"""
+
+DEPENDENCY_FILES = ("requirements.txt", "setup.py", "setup.cfg", "pyproject.toml")
+HASH_LENGTH = 16
+
+
+def dependency_hash(build_dirs: List[str], python_version: str) -> str:
+    build_dirs = sorted(set(os.path.abspath(build_dir) for build_dir in build_dirs))
+    paths = [
+        os.path.join(build_dir, filename)
+        for build_dir in build_dirs
+        for filename in DEPENDENCY_FILES
+    ]
+    # hash names relative to the build directories, so the hash does not depend on where the
+    # repository is checked out
+    root = os.path.commonpath(build_dirs)
+    digest = action_cache.hash_files(paths, python_version, platform.machine(), root=root)
+    return digest[:HASH_LENGTH]
+
+
+def cache_tag(project: str, build_dirs: List[str], python_version: str) -> str:
+    return f"{project}/deps-{dependency_hash(build_dirs, python_version)}"
+
+
+def cache_flags(tag: str, use_cache: bool = True) -> List[str]:
+    flags = [f"--deps-cache-to={tag}"]
+    if use_cache:
+        flags.append(f"--deps-cache-from={tag}")
+    return flags
@@ -1,22 +1,92 @@
-from github import Github
+#!/usr/bin/env python
+
+# Fetches the avatar of the GitHub user who authored the current commit.
+#
+# Makes a single REST request with the standard library instead of going through PyGithub, and
+# caches the result keyed by commit SHA and author email in the shared action cache directory (see
+# action_cache.py), so later steps and jobs for the same commit do not call the API again. The
+# avatar is only decoration: if the API is slow, rate limited or unreachable this prints nothing
+# and exits successfully.
+#
+# Usage:
+#   python fetch_github_avatar.py [author-email]
+#
+# The email defaults to $EMAIL, as exported by create_branch_deployment.sh.
+
+import http.client
+import json
 import os
+import sys
+import urllib.parse
+from typing import Optional
 
-"""
-Fetches a user's avatar from the Github API based on email or username
-"""
+import action_cache
 
+TIMEOUT_SECONDS = 5
 
-def main():
-    # Fetch various pieces of info from the environment
-    g = Github(os.getenv("GITHUB_TOKEN"))
 
-    repo_id = os.getenv("GITHUB_REPOSITORY")
-    commit_sha = os.getenv("GITHUB_SHA")
+def request_commit_author(api_url: str, repository: str, sha: str, token: str) -> Optional[dict]:
+    """Returns the `author` of the commit, which is null for emails not linked to a user.
+
+    Raises on errors, so that failed lookups are not cached.
+    """
+    url = urllib.parse.urlsplit(api_url)
+    connection_class = (
+        http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    )
+    connection = connection_class(url.netloc, timeout=TIMEOUT_SECONDS)
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "dagster-cloud-action",
+    }
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    try:
+        connection.request(
+            "GET", f"{url.path.rstrip('/')}/repos/{repository}/commits/{sha}", headers=headers
+        )
+        response = connection.getresponse()
+        body = response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"GitHub API returned {response.status} {response.reason}")
+    return json.loads(body).get("author")
+
 
-    repo = g.get_repo(repo_id)
-    commit = repo.get_commit(commit_sha)
+def fetch_avatar_url(email: str) -> str:
+    repository = os.getenv("GITHUB_REPOSITORY")
+    sha = os.getenv("GITHUB_SHA")
+    if not repository or not sha:
+        return ""
 
-    print(commit.author.avatar_url)
+    cache_path = os.path.join(
+        action_cache.cache_dir("avatars"),
+        action_cache.hash_files([], repository, sha, email) + ".json",
+    )
+    cached = action_cache.load_json(cache_path)
+    if cached is not None:
+        return cached.get("avatar_url", "")
+
+    try:
+        author = request_commit_author(
+            os.getenv("GITHUB_API_URL", "https://api.github.com"),
+            repository,
+            sha,
+            os.getenv("GITHUB_TOKEN", ""),
+        )
+    except Exception as e:
+        print(f"Could not fetch the commit author's avatar: {e}", file=sys.stderr)
+        return ""
+
+    avatar_url = (author or {}).get("avatar_url") or ""
+    action_cache.store_json(cache_path, {"avatar_url": avatar_url})
+    return avatar_url
+
+
+def main():
+    email = sys.argv[1] if len(sys.argv) > 1 else os.getenv("EMAIL", "")
+    print(fetch_avatar_url(email))
 
 
 if __name__ == "__main__":
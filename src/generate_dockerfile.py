@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+"""
+Generates the Dockerfile for a serverless code location, ordered so that layers are rebuilt as
+rarely as possible:
+
+- the dependency manifests are copied and installed before the rest of the code, so a code change
+  does not reinstall the dependencies, and pip downloads are kept in a BuildKit cache mount. When
+  the dependencies refer to files of the build context (`-e .`, `./pkg`, `-r other.txt`, ...) or
+  the package is declared in a pyproject.toml or setup.cfg, they are installed after the code is
+  copied instead, in a single layer.
+- the env vars are set in a single ENV instruction after the dependency layers, so changing them
+  only rebuilds the layers that copy the code. Env vars that configure pip (PIP_*) are set before
+  the dependency layers instead, since they can change what gets installed.
+
+With --multi-stage, the dependencies are installed into a venv in a builder stage, and only the
+venv and the code are copied into the runtime stage, leaving compilers, caches and other build
+only files out of the final image. Both stages start FROM the same base image and the venv uses its
+system site packages, so packages preinstalled in the base image are not installed again. The pre
+install script runs in both stages, since the OS packages it installs may be needed to build the
+dependencies as well as to import them. The post install script runs in the runtime stage.
+
+With --shared-base-image, the image starts FROM a base image that already has the requirements
+shared by the workspace's locations, see shared_base.py, so pip only installs the location's own
+extras. Unless custom base images are enabled, it must be a shared base image of --registry.
+
+Prints a report of the files and values each layer depends on, which is also added to the job
+summary on GitHub.
+
+Usage:
+
+    python generate_dockerfile.py <target-directory> [--multi-stage]
+        [--shared-base-image <image> --registry <registry>]
+
+Reads the base image from $INPUT_BASE_IMAGE, used when $CUSTOM_BASE_IMAGE_ALLOWED is set, and the
+env vars from $INPUT_ENV_VARS, a JSON object.
+"""
+
+DEFAULT_BASE_IMAGE = "python:3.8-slim"
+APP_DIR = "/opt/dagster/app"
+DEPS_DIR = "/opt/dagster/deps"
+VENV_DIR = "/opt/dagster/venv"
+PIP_CACHE_MOUNT = "--mount=type=cache,target=/root/.cache/pip"
+# tag of the images built by shared_base.py, followed by a hash
+SHARED_BASE_TAG_PREFIX = "shared-base"
+
+PRE_INSTALL_SCRIPT = "dagster_cloud_pre_install.sh"
+POST_INSTALL_SCRIPT = "dagster_cloud_post_install.sh"
+# installed with `pip install .`. Only a lone setup.py is installed before the code is copied, like
+# the template did, since setup.cfg and pyproject.toml builds usually need the package's sources.
+PACKAGE_MANIFESTS = ("setup.py", "setup.cfg", "pyproject.toml")
+REQUIREMENTS_FILE = "requirements.txt"
+# requirements that refer to other files of the build context: includes, constraints, editable
+# installs and local paths
+LOCAL_REQUIREMENT_PREFIXES = (
+    "-r",
+    "--requirement",
+    "-c",
+    "--constraint",
+    "-e",
+    "--editable",
+    ".",
+    "/",
+    "~",
+    "file:",
+)
+
+# (instruction, what the layer's cache key depends on besides the previous layers)
+Layer = Tuple[str, str]
+
+
+def get_base_image() -> str:
+    base_image = os.getenv("INPUT_BASE_IMAGE")
+    if base_image and not os.getenv("CUSTOM_BASE_IMAGE_ALLOWED"):
+        print(
+            f"Custom base images are not enabled for this organization, defaulting to"
+            f" {DEFAULT_BASE_IMAGE}."
+        )
+        base_image = None
+    return base_image or DEFAULT_BASE_IMAGE
+
+
+def get_shared_base_image(shared_base_image: str, registry: str) -> Optional[str]:
+    # other images would be a way around the custom base image check
+    pattern = rf"{re.escape(registry)}:{SHARED_BASE_TAG_PREFIX}-[0-9a-f]+"
+    if os.getenv("CUSTOM_BASE_IMAGE_ALLOWED") or (
+        registry and re.fullmatch(pattern, shared_base_image)
+    ):
+        return shared_base_image
+    print(
+        f"{shared_base_image} was not built by shared_base.py in the {registry or 'missing'}"
+        " registry and custom base images are not enabled for this organization, ignoring it."
+    )
+    return None
+
+
+def format_env(env_vars: Dict[str, str]) -> str:
+    return "ENV " + " \\\n    ".join(
+        f"{k}={json.dumps(str(v), ensure_ascii=False)}" for k, v in env_vars.items()
+    )
+
+
+def declares_package(pyproject_path: str) -> bool:
+    # a pyproject.toml may only hold tool settings, like black's
+    with open(pyproject_path, encoding="utf-8") as f:
+        return bool(re.search(r"^\[(project|build-system)\]", f.read(), re.MULTILINE))
+
+
+def requirements_need_sources(path: str) -> bool:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = re.sub(r"(^|\s)#.*", "", line).strip()
+            if line.startswith(LOCAL_REQUIREMENT_PREFIXES) or "@ file:" in line:
+                return True
+    return False
+
+
+def generate_layers(
+    target_dir: str,
+    base_image: str,
+    env_vars: Dict[str, str],
+    multi_stage: bool = False,
+) -> List[Layer]:
+    def exists(filename):
+        return os.path.isfile(os.path.join(target_dir, filename))
+
+    pip_env_vars = {k: v for k, v in env_vars.items() if k.startswith("PIP_")}
+    other_env_vars = {k: v for k, v in env_vars.items() if k not in pip_env_vars}
+
+    layers: List[Layer] = [
+        (f"FROM {base_image} AS builder" if multi_stage else f"FROM {base_image}", "base image")
+    ]
+    if pip_env_vars:
+        layers.append((format_env(pip_env_vars), "env vars " + ", ".join(pip_env_vars)))
+    if multi_stage:
+        # packages of the base image, like the shared requirements, are installed outside of the
+        # venv. The runtime stage starts FROM the same image, so the venv still finds them there.
+        layers.append((f"RUN python -m venv --system-site-packages {VENV_DIR}", "-"))
+        layers.append((f'ENV PATH="{VENV_DIR}/bin:$PATH"', "-"))
+    layers.append((f"WORKDIR {DEPS_DIR}", "-"))
+
+    if exists(PRE_INSTALL_SCRIPT):
+        layers.append((f"COPY {PRE_INSTALL_SCRIPT} ./", PRE_INSTALL_SCRIPT))
+        layers.append((f"RUN ./{PRE_INSTALL_SCRIPT}", "-"))
+
+    package_manifests = [filename for filename in PACKAGE_MANIFESTS if exists(filename)]
+    install_package = "setup.py" in package_manifests or (
+        "pyproject.toml" in package_manifests
+        and declares_package(os.path.join(target_dir, "pyproject.toml"))
+    )
+    install_requirements = exists(REQUIREMENTS_FILE)
+    install_with_code = (install_package and package_manifests != ["setup.py"]) or (
+        install_requirements
+        and requirements_need_sources(os.path.join(target_dir, REQUIREMENTS_FILE))
+    )
+
+    if install_with_code:
+        # the dependencies can't be installed without the code, install both in one layer
+        commands = []
+        if install_package:
+            commands.append("pip install .")
+        if install_requirements:
+            commands.append(f"pip install -r {REQUIREMENTS_FILE}")
+        if multi_stage:
+            # into the builder's venv, the code is copied again into the runtime stage
+            layers.append((f"WORKDIR {APP_DIR}", "-"))
+            layers.append((f"COPY . {APP_DIR}", "all files of the build context"))
+            layers.append((f"RUN {PIP_CACHE_MOUNT} {' && '.join(commands)}", "-"))
+    else:
+        if install_package:
+            # installs the dependencies of the package, the code itself is copied later
+            layers.append(("COPY setup.py ./", "setup.py"))
+            layers.append((f"RUN {PIP_CACHE_MOUNT} pip install .", "-"))
+        if install_requirements:
+            layers.append((f"COPY {REQUIREMENTS_FILE} ./", REQUIREMENTS_FILE))
+            layers.append((f"RUN {PIP_CACHE_MOUNT} pip install -r {REQUIREMENTS_FILE}", "-"))
+
+    if multi_stage:
+        layers.append((f"FROM {base_image}", "base image"))
+        if exists(PRE_INSTALL_SCRIPT):
+            # eg shared libraries that compiled packages of the venv load
+            layers.append((f"WORKDIR {DEPS_DIR}", "-"))
+            layers.append((f"COPY {PRE_INSTALL_SCRIPT} ./", PRE_INSTALL_SCRIPT))
+            layers.append((f"RUN ./{PRE_INSTALL_SCRIPT}", "-"))
+        layers.append((f"COPY --from=builder {VENV_DIR} {VENV_DIR}", "the builder stage's venv"))
+        layers.append((f'ENV PATH="{VENV_DIR}/bin:$PATH"', "-"))
+
+    # the runtime stage does not inherit the env vars set in the builder stage
+    image_env_vars = env_vars if multi_stage else other_env_vars
+    if image_env_vars:
+        layers.append((format_env(image_env_vars), "env vars " + ", ".join(image_env_vars)))
+
+    layers.append((f"WORKDIR {APP_DIR}", "-"))
+    layers.append((f"COPY . {APP_DIR}", "all files of the build context"))
+    if install_with_code and not multi_stage:
+        layers.append((f"RUN {PIP_CACHE_MOUNT} {' && '.join(commands)}", "-"))
+    if exists(POST_INSTALL_SCRIPT):
+        layers.append((f"RUN ./{POST_INSTALL_SCRIPT}", "-"))
+    # Make sure dagster-cloud is installed. Fail early here if not.
+    layers.append(("RUN dagster-cloud --version", "-"))
+    return layers
+
+
+def format_report(layers: List[Layer]) -> str:
+    lines = ["| Layer | Inputs besides the earlier layers |", "| --- | --- |"]
+    for instruction, inputs in layers:
+        first_line = instruction.splitlines()[0].rstrip(" \\")
+        lines.append(f"| `{first_line}` | {inputs} |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("target_dir")
+    parser.add_argument("--multi-stage", action="store_true")
+    parser.add_argument("--shared-base-image")
+    parser.add_argument("--registry", default="")
+    args = parser.parse_args()
+
+    target_dir = args.target_dir
+    env_vars = json.loads(os.getenv("INPUT_ENV_VARS") or "{}")
+    # the shared base image is built FROM get_base_image(), see shared_base.py
+    base_image = (
+        args.shared_base_image and get_shared_base_image(args.shared_base_image, args.registry)
+    ) or get_base_image()
+    layers = generate_layers(target_dir, base_image, env_vars, args.multi_stage)
+    with open(os.path.join(target_dir, "Dockerfile"), "w", encoding="utf-8") as f:
+        f.write("\n".join(instruction for instruction, _ in layers) + "\n")
+
+    report = format_report(layers)
+    print("Generated Dockerfile. A layer is rebuilt when its inputs or an earlier layer change:")
+    print(report)
+    if os.getenv("GITHUB_STEP_SUMMARY"):
+        with open(os.environ["GITHUB_STEP_SUMMARY"], "a", encoding="utf-8") as f:
+            f.write(f"### Dockerfile layers for {target_dir}\n\n{report}\n")
+
+
+if __name__ == "__main__":
+    main()
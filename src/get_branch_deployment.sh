@@ -1,5 +1,7 @@
 #!/bin/bash -
 
+# Same rule as ci_context.get_dagster_cloud_url(). These scripts need nothing else from the CI
+# context, so it is repeated here rather than starting python for it.
 if [ -z $DAGSTER_CLOUD_URL ]; then
     if [ -z $INPUT_DAGSTER_CLOUD_URL ]; then
         export DAGSTER_CLOUD_URL="https://dagster.cloud/${INPUT_ORGANIZATION_ID}"
@@ -14,6 +16,7 @@ fi
 
 git config --global --add safe.directory $(realpath $INPUT_SOURCE_DIRECTORY)
 
-BRANCH_DEPLOYMENT_NAME=$(dagster-cloud ci branch-deployment $INPUT_SOURCE_DIRECTORY)
+# Reuses the name resolved earlier in this workflow for the same commit, if any
+BRANCH_DEPLOYMENT_NAME=$(python /branch_deployment_cache.py resolve -- dagster-cloud ci branch-deployment $INPUT_SOURCE_DIRECTORY)
 
 echo "deployment=${BRANCH_DEPLOYMENT_NAME}" >> $GITHUB_OUTPUT
\ No newline at end of file
@@ -3,9 +3,18 @@
 import os
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
 import parse_workspace
 
+# the shared action scripts are in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deps_cache  # noqa: E402
+import stream_output  # noqa: E402
+
 
 def deploy(dagster_cloud_yaml_file, deployment=None):
     # Use 3.8 as default version for backward compatibility
@@ -25,47 +34,91 @@ def deploy(dagster_cloud_yaml_file, deployment=None):
     project = os.getenv("CI_PROJECT_NAME")
     project_url = os.getenv("CI_PROJECT_URL")
     commit = os.getenv("CI_COMMIT_SHORT_SHA")
-    branch = os.getenv("CI_COMMIT_BRANCH") or os.getenv("CI_COMMIT_REF_NAME")
 
-    deps_cache = project + "/" + branch
     commit_url = project_url + "/commit/" + commit
 
     locations = parse_workspace.get_locations(dagster_cloud_yaml_file)
     assert not os.getenv("DISABLE_FAST_DEPLOYS")
 
+    def location_command(location: parse_workspace.Location) -> List[str]:
+        command_args = [
+            "dagster-cloud",
+            "serverless",
+            "deploy-python-executable",
+            f"--location-name={location.name}",
+            f"--location-file={location.location_file}",
+            f"--commit-hash={commit}",
+            f"--git-url={commit_url}",
+            f"--python-version={python_version}",
+            *deps_cache.cache_flags(
+                deps_cache.cache_tag(project, [location.build_folder], python_version),
+                use_cache=not os.getenv("FORCE_REBUILD_DEPS"),
+            ),
+        ]
+        if deployment:
+            command_args.append(f"--url={url}/{deployment}")
+        if location.build_folder:
+            command_args.append(location.build_folder)
+        return command_args
+
+    max_parallel_deploys = int(os.getenv("MAX_PARALLEL_DEPLOYS") or "0")
+    if max_parallel_deploys > 1 and len(locations) > 1:
+        deploy_concurrently(locations, location_command, max_parallel_deploys)
+        return
+
     for location in locations:
         try:
             print("Updating code location", location.name)
-            command_args = [
-                "dagster-cloud",
-                "serverless",
-                "deploy-python-executable",
-                f"--location-name={location.name}",
-                f"--location-file={location.location_file}",
-                f"--commit-hash={commit}",
-                f"--git-url={commit_url}",
-                f"--python-version={python_version}",
-                f"--deps-cache-to={deps_cache}",
-            ] + (
-                (
-                    [
-                        f"--deps-cache-from={deps_cache}",
-                    ]
-                )
-                if not os.getenv("FORCE_REBUILD_DEPS")
-                else []
-            )
-            if deployment:
-                command_args.append(f"--url={url}/{deployment}")
-            if location.build_folder:
-                command_args.append(location.build_folder)
-            subprocess.check_call(command_args, stderr=subprocess.STDOUT)
+            subprocess.check_call(location_command(location), stderr=subprocess.STDOUT)
         except subprocess.CalledProcessError as err:
             print("Failed to update code location", location.name)
             print(err.output)
             sys.exit(1)
 
 
+def deploy_concurrently(locations: List[parse_workspace.Location], location_command, max_workers):
+    # Deploys every location even if some fail, with output prefixed by the location name
+    print(
+        f"Deploying {len(locations)} locations with up to {max_workers} concurrent deploys",
+        flush=True,
+    )
+
+    def deploy_location(location) -> Tuple[int, float]:
+        start_time = time.monotonic()
+        returncode, _ = stream_output.run(
+            location_command(location), prefix=f"[{location.name}] ", tail_lines=0
+        )
+        return returncode, time.monotonic() - start_time
+
+    results: Dict[str, Tuple[Optional[int], float]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(deploy_location, location): location for location in locations}
+        for future in as_completed(futures):
+            location = futures[future]
+            try:
+                results[location.name] = future.result()
+            except OSError as err:
+                print(f"[{location.name}] Failed to run deploy: {err}", flush=True)
+                results[location.name] = (None, 0.0)
+
+    print_summary(locations, results)
+    if any(returncode != 0 for returncode, _ in results.values()):
+        sys.exit(1)
+
+
+def print_summary(locations: List[parse_workspace.Location], results):
+    name_width = max(len("Location"), *(len(location.name) for location in locations))
+    print(f"{'Location':<{name_width}}  Status   Duration")
+    for location in locations:
+        returncode, duration = results[location.name]
+        status = "success" if returncode == 0 else "failed"
+        print(f"{location.name:<{name_width}}  {status:<7}  {duration:7.1f}s")
+    failed = [name for name, (returncode, _) in results.items() if returncode != 0]
+    if failed:
+        print("Failed to update code locations:", ", ".join(sorted(failed)))
+    sys.stdout.flush()
+
+
 if __name__ == "__main__":
     dagster_cloud_yaml_file = sys.argv[1]
     deployment = sys.argv[2] if len(sys.argv) > 2 else None
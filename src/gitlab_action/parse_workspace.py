@@ -4,7 +4,10 @@ import sys
 from dataclasses import asdict, dataclass
 from typing import List, Optional
 
-import yaml
+# the shared action scripts are in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workspace  # noqa: E402
 
 
 @dataclass
@@ -18,26 +21,20 @@ class Location:
 
 def get_locations(dagster_cloud_yaml_file) -> List[Location]:
     """Returns list of locations parsed from dagster_cloud.yaml."""
-    base_dir = os.path.abspath(os.path.dirname(dagster_cloud_yaml_file))
-
-    with open(dagster_cloud_yaml_file, encoding="utf-8") as yaml_file:
-        workspace_contents = yaml_file.read()
-        workspace_contents_yaml = yaml.safe_load(workspace_contents)
-
-        locations = []
-        for location in workspace_contents_yaml["locations"]:
-            build = location.get("build", {"directory": "."})
-            location_dir = os.path.join(base_dir, build.get("directory"))
-            locations.append(
-                Location(
-                    name=location["location_name"],
-                    directory=location_dir,
-                    build_folder=location_dir,
-                    location_file=os.path.abspath(dagster_cloud_yaml_file),
-                    registry=build.get("registry"),
-                )
+    location_file = os.path.abspath(dagster_cloud_yaml_file)
+    locations = []
+    for location in workspace.load_locations(dagster_cloud_yaml_file):
+        location_dir = workspace.get_location_directory(dagster_cloud_yaml_file, location)
+        locations.append(
+            Location(
+                name=location.name,
+                directory=location_dir,
+                build_folder=location_dir,
+                location_file=location_file,
+                registry=location.registry,
             )
-        return locations
+        )
+    return locations
 
 
 if __name__ == "__main__":
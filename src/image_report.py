@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# Reports the layer count and compressed size of a pushed image, to track the weight of each code
+# location's image.
+#
+# Reads the manifest from the registry with `docker buildx imagetools inspect --raw`, so the image
+# does not need to be pulled. For multi-platform images the manifest of --platform is used.
+#
+# Usage:
+#   python image_report.py <image> [--name <location-name>] [--platform linux/amd64]
+#
+# Prints the report and appends it to the GitHub step summary.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Optional, Tuple
+
+INDEX_MEDIA_TYPES = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+)
+
+
+def inspect_raw(image: str) -> dict:
+    output = subprocess.check_output(
+        ["docker", "buildx", "imagetools", "inspect", image, "--raw"], encoding="utf-8"
+    )
+    return json.loads(output)
+
+
+def get_repository(image: str) -> str:
+    repository = image.split("@")[0]
+    # a tag follows a colon in the last path component, other colons are a registry's port
+    if ":" in repository.rsplit("/", 1)[-1]:
+        repository = repository.rsplit(":", 1)[0]
+    return repository
+
+
+def get_manifest(image: str, platform: str) -> dict:
+    manifest = inspect_raw(image)
+    if manifest.get("mediaType") not in INDEX_MEDIA_TYPES and "manifests" not in manifest:
+        return manifest
+    os_name, _, arch = platform.partition("/")
+    for entry in manifest["manifests"]:
+        entry_platform = entry.get("platform", {})
+        if entry_platform.get("os") == os_name and entry_platform.get("architecture") == arch:
+            return inspect_raw(f"{get_repository(image)}@{entry['digest']}")
+    raise ValueError(f"No {platform} manifest found for {image}")
+
+
+def layer_stats(manifest: dict) -> Tuple[int, int]:
+    layers = manifest.get("layers", [])
+    return len(layers), sum(layer.get("size", 0) for layer in layers)
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def report(image: str, name: Optional[str], platform: str) -> str:
+    layer_count, size = layer_stats(get_manifest(image, platform))
+    return (
+        "| Location | Image | Layers | Compressed size |\n"
+        "| --- | --- | --- | --- |\n"
+        f"| {name or '-'} | `{image}` | {layer_count} | {format_size(size)} |\n"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("image")
+    parser.add_argument("--name")
+    parser.add_argument("--platform", default="linux/amd64")
+    args = parser.parse_args()
+
+    try:
+        text = report(args.image, args.name, args.platform)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        # the report is informational, it never fails the build
+        print(f"Could not inspect {args.image}: {e}", file=sys.stderr)
+        sys.exit(0)
+    print(text)
+    if os.getenv("GITHUB_STEP_SUMMARY"):
+        with open(os.environ["GITHUB_STEP_SUMMARY"], "a", encoding="utf-8") as f:
+            f.write(f"### Image size\n\n{text}\n")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+# Computes a content addressed image tag for a docker build context, and checks whether an image
+# with that tag is already in the registry.
+#
+# The tag is a hash of every file docker would send as the build context (following the context's
+# .dockerignore), including the Dockerfile, plus any extra values passed with --extra. Building
+# the same context again would produce the same image, so when the tag already exists in the
+# registry the build and push can be skipped and the existing image deployed.
+#
+# Usage:
+#   python image_tag.py <context-dir> --registry <registry> --prefix <tag-prefix> [--extra <value>]
+#
+# Prints `tag=<tag>` and `exists=true|false`, meant to be appended to $GITHUB_OUTPUT.
+
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import sys
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+# docker tags are limited to 128 characters
+MAX_TAG_LENGTH = 128
+HASH_LENGTH = 24
+
+
+def load_dockerignore(context_dir: str) -> List[Tuple[bool, Pattern]]:
+    """Returns (is_exclusion, regex) for each .dockerignore pattern, in order."""
+    path = os.path.join(context_dir, ".dockerignore")
+    if not os.path.isfile(path):
+        return []
+    patterns = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            pattern = line.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            exclude = not pattern.startswith("!")
+            pattern = pattern.lstrip("!").strip()
+            pattern = os.path.normpath(pattern).lstrip("/")
+            patterns.append((exclude, re.compile(pattern_to_regex(pattern))))
+    return patterns
+
+
+def pattern_to_regex(pattern: str) -> str:
+    """Translates a .dockerignore pattern, which also matches everything inside a directory."""
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+            # `**/` also matches no directories
+            if pattern.startswith("/", index):
+                regex = regex[:-2] + "(.*/)?"
+                index += 1
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            end = pattern.find("]", index)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                regex += pattern[index : end + 1]
+                index = end
+        else:
+            regex += re.escape(char)
+        index += 1
+    return f"^{regex}(/.*)?$"
+
+
+def is_ignored(path: str, patterns: List[Tuple[bool, Pattern]]) -> bool:
+    ignored = False
+    for exclude, regex in patterns:
+        if regex.match(path):
+            ignored = exclude
+    return ignored
+
+
+def context_files(context_dir: str) -> Iterable[str]:
+    """Yields the paths relative to context_dir that are sent to docker, in a stable order."""
+    patterns = load_dockerignore(context_dir)
+    # without exceptions, nothing inside an ignored directory is sent
+    can_prune = all(exclude for exclude, _ in patterns)
+    for dirpath, dirnames, filenames in os.walk(context_dir):
+        if can_prune:
+            dirnames[:] = [
+                dirname
+                for dirname in dirnames
+                if not is_ignored(
+                    os.path.relpath(os.path.join(dirpath, dirname), context_dir), patterns
+                )
+            ]
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.relpath(os.path.join(dirpath, filename), context_dir)
+            if not is_ignored(path, patterns):
+                yield path
+        # symlinks to directories are sent as symlinks
+        for dirname in dirnames:
+            if os.path.islink(os.path.join(dirpath, dirname)):
+                path = os.path.relpath(os.path.join(dirpath, dirname), context_dir)
+                if not is_ignored(path, patterns):
+                    yield path
+
+
+def content_hash(context_dir: str, extra: Iterable[str] = ()) -> str:
+    digest = hashlib.sha256()
+    for value in extra:
+        digest.update(value.encode("utf-8") + b"\0")
+    for path in context_files(context_dir):
+        full_path = os.path.join(context_dir, path)
+        digest.update(path.encode("utf-8") + b"\0")
+        if os.path.islink(full_path):
+            digest.update(b"link\0" + os.readlink(full_path).encode("utf-8") + b"\0")
+            continue
+        # the executable bit is part of the image
+        digest.update(b"x\0" if os.access(full_path, os.X_OK) else b"-\0")
+        file_digest = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                file_digest.update(chunk)
+        digest.update(file_digest.digest())
+    return digest.hexdigest()
+
+
+def content_tag(prefix: str, context_dir: str, extra: Iterable[str] = ()) -> str:
+    tag_hash = content_hash(context_dir, extra)[:HASH_LENGTH]
+    prefix = re.sub(r"[^A-Za-z0-9_.-]", "-", prefix)[: MAX_TAG_LENGTH - HASH_LENGTH - 1]
+    return f"{prefix}-{tag_hash}" if prefix else tag_hash
+
+
+def image_exists(image: str) -> Optional[bool]:
+    """Checks the registry for image, returns None if docker can't tell."""
+    try:
+        proc = subprocess.run(
+            ["docker", "manifest", "inspect", image],
+            capture_output=True,
+            encoding="utf-8",
+            check=False,
+        )
+    except OSError:
+        return None
+    if proc.returncode == 0:
+        return True
+    if re.search(r"no such manifest|manifest unknown|not found", proc.stderr, re.IGNORECASE):
+        return False
+    print(f"Could not check for {image}: {proc.stderr.strip()}", file=sys.stderr)
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("context_dir")
+    parser.add_argument("--registry", required=True)
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--extra", action="append", default=[])
+    args = parser.parse_args()
+
+    tag = content_tag(args.prefix, args.context_dir, args.extra)
+    exists = image_exists(f"{args.registry}:{tag}")
+    if exists:
+        print(f"Found {args.registry}:{tag}, skipping the build", file=sys.stderr)
+    print(f"tag={tag}")
+    print(f"exists={'true' if exists else 'false'}")
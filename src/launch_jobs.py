@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+
+# Launches several jobs concurrently and optionally waits for all of their runs.
+#
+# Reads the job specs from $INPUT_JOBS, a JSON list of objects with a `job_name` and optionally
+# `location_name`, `repository_name`, `tags` and `config`. Missing values default to the
+# INPUT_LOCATION_NAME, INPUT_REPOSITORY_NAME, INPUT_TAGS_JSON and INPUT_CONFIG_JSON inputs.
+# Without $INPUT_JOBS, launches the single job INPUT_JOB_NAME.
+#
+# All jobs are launched at the same time with `dagster-cloud job launch`. With INPUT_WAIT, the
+# statuses of all runs are then polled together with one GraphQL request per interval. With
+# INPUT_WAIT_STRATEGY=backoff, polling starts after INITIAL_INTERVAL_SECONDS and the interval
+# doubles, with jitter, up to INPUT_INTERVAL, so short runs are reported soon after they finish
+# and long runs are polled less often.
+#
+# With INPUT_STREAM_EVENTS, each poll also fetches the events logged by the runs since the previous
+# poll, using the event log cursor of each run, and prints them. Events are printed up to
+# INPUT_MAX_EVENT_BYTES per run.
+#
+# Writes `run_id` (the first run) and `run_statuses`, a JSON map of run IDs to statuses, to
+# $GITHUB_OUTPUT. Exits with an error if a job could not be launched or, when waiting, if any run
+# did not succeed.
+
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+DEFAULT_INTERVAL_SECONDS = 30
+INITIAL_INTERVAL_SECONDS = 1
+BACKOFF_FACTOR = 2
+DEFAULT_MAX_EVENT_BYTES = 256 * 1024
+EVENTS_PAGE_SIZE = 1000
+TERMINAL_STATUSES = {"SUCCESS", "FAILURE", "CANCELED"}
+
+EVENTS_QUERY_TEMPLATE = """
+query RunEvents($limit: Int{params}) {{
+  {fields}
+}}
+
+fragment EventConnectionFragment on EventConnectionOrError {{
+  __typename
+  ... on EventConnection {{
+    events {{
+      __typename
+      ... on MessageEvent {{
+        message
+        level
+        timestamp
+        stepKey
+        eventType
+      }}
+    }}
+    cursor
+    hasMore
+  }}
+}}
+"""
+
+RUN_STATUSES_QUERY = """
+query RunStatuses($filter: RunsFilter) {
+  runsOrError(filter: $filter) {
+    __typename
+    ... on Runs {
+      results {
+        runId
+        status
+      }
+    }
+    ... on PythonError {
+      message
+    }
+  }
+}
+"""
+
+
+def load_job_specs() -> List[dict]:
+    if os.getenv("INPUT_JOBS"):
+        specs = json.loads(os.environ["INPUT_JOBS"])
+        if not isinstance(specs, list) or not specs:
+            raise ValueError("jobs must be a non empty JSON list")
+    else:
+        specs = [{"job_name": os.environ["INPUT_JOB_NAME"]}]
+    default_tags = json.loads(os.getenv("INPUT_TAGS_JSON") or "{}")
+    default_config = json.loads(os.getenv("INPUT_CONFIG_JSON") or "{}")
+    return [
+        {
+            "job_name": spec["job_name"],
+            "location_name": spec.get("location_name") or os.environ["INPUT_LOCATION_NAME"],
+            "repository_name": spec.get("repository_name")
+            or os.getenv("INPUT_REPOSITORY_NAME")
+            or "__repository__",
+            "tags": spec.get("tags", default_tags),
+            "config": spec.get("config", default_config),
+        }
+        for spec in specs
+    ]
+
+
+def parse_run_id(output: str) -> Optional[str]:
+    """Finds the run ID in the output of `dagster-cloud job launch`, the same way as run.sh."""
+    match = re.search(r"Run ([a-f0-9-]+)", output)
+    if match:
+        return match.group(1)
+    first_line = output.strip().splitlines()[0] if output.strip() else ""
+    if re.match(r"^[a-zA-Z0-9-]+$", first_line):
+        return first_line
+    return None
+
+
+async def launch(spec: dict, url: str, deployment: str) -> Optional[str]:
+    proc = await asyncio.create_subprocess_exec(
+        "dagster-cloud",
+        "job",
+        "launch",
+        "--url",
+        url,
+        "--deployment",
+        deployment,
+        "--api-token",
+        os.getenv("DAGSTER_CLOUD_API_TOKEN", ""),
+        "--location",
+        spec["location_name"],
+        "--repository",
+        spec["repository_name"],
+        "--job",
+        spec["job_name"],
+        "--tags",
+        json.dumps(spec["tags"]),
+        "--config-json",
+        json.dumps(spec["config"]),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    stdout, _ = await proc.communicate()
+    output = stdout.decode("utf-8", errors="replace")
+    run_id = parse_run_id(output) if proc.returncode == 0 else None
+    if run_id:
+        print(f"Launched run {run_id} of job {spec['job_name']}", flush=True)
+    else:
+        print(f"::error::Failed to launch job {spec['job_name']}: {output.strip()}", flush=True)
+    return run_id
+
+
+def graphql(url: str, deployment: str, query: str, variables: dict) -> dict:
+    request = urllib.request.Request(
+        f"{url}/{deployment}/graphql",
+        data=json.dumps({"query": query, "variables": variables}).encode("utf-8"),
+        headers={
+            "Content-Type": "application/json",
+            "Dagster-Cloud-Api-Token": os.getenv("DAGSTER_CLOUD_API_TOKEN", ""),
+        },
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        result = json.load(response)
+    if result.get("errors"):
+        raise RuntimeError(result["errors"][0].get("message"))
+    return result["data"]
+
+
+def query_run_statuses(url: str, deployment: str, run_ids: List[str]) -> Dict[str, str]:
+    result = graphql(url, deployment, RUN_STATUSES_QUERY, {"filter": {"runIds": run_ids}})[
+        "runsOrError"
+    ]
+    if result["__typename"] != "Runs":
+        raise RuntimeError(result.get("message", result["__typename"]))
+    return {run["runId"]: run["status"] for run in result["results"]}
+
+
+class EventTail:
+    """Prints the events logged by runs, fetching only the events after each run's cursor.
+
+    Stops printing the events of a run after max_bytes of messages.
+    """
+
+    def __init__(self, url: str, deployment: str, max_bytes: int):
+        self.url = url
+        self.deployment = deployment
+        self.max_bytes = max_bytes
+        self.cursors: Dict[str, Optional[str]] = {}
+        self.printed_bytes: Dict[str, int] = {}
+        self.requests = 0
+
+    def fetch(self, run_ids: List[str]):
+        """Prints the new events of run_ids, fetching all of them with one request per page."""
+        run_ids = [run_id for run_id in run_ids if not self.is_truncated(run_id)]
+        while run_ids:
+            self.requests += 1
+            variables: dict = {"limit": EVENTS_PAGE_SIZE}
+            fields = []
+            for index, run_id in enumerate(run_ids):
+                variables[f"run{index}"] = run_id
+                variables[f"cursor{index}"] = self.cursors.get(run_id)
+                fields.append(
+                    f"run{index}: logsForRun(runId: $run{index}, afterCursor: $cursor{index},"
+                    f" limit: $limit) {{ ...EventConnectionFragment }}"
+                )
+            query = EVENTS_QUERY_TEMPLATE.format(
+                params="".join(
+                    f", $run{index}: ID!, $cursor{index}: String" for index in range(len(run_ids))
+                ),
+                fields="\n  ".join(fields),
+            )
+            data = graphql(self.url, self.deployment, query, variables)
+            has_more = []
+            for index, run_id in enumerate(run_ids):
+                connection = data[f"run{index}"]
+                if connection["__typename"] != "EventConnection":
+                    print(f"Could not fetch events of run {run_id}", flush=True)
+                    continue
+                self.cursors[run_id] = connection["cursor"]
+                for event in connection["events"]:
+                    self.print_event(run_id, event)
+                if connection["hasMore"] and not self.is_truncated(run_id):
+                    has_more.append(run_id)
+            run_ids = has_more
+
+    def is_truncated(self, run_id: str) -> bool:
+        return self.printed_bytes.get(run_id, 0) >= self.max_bytes
+
+    def print_event(self, run_id: str, event: dict):
+        message = event.get("message")
+        if message is None or self.is_truncated(run_id):
+            return
+        timestamp = datetime.fromtimestamp(int(event["timestamp"]) / 1000, tz=timezone.utc)
+        step = f" {event['stepKey']}" if event.get("stepKey") else ""
+        line = (
+            f"[{run_id[:8]}] {timestamp:%H:%M:%S} {event.get('level', '')}{step} -"
+            f" {event.get('eventType') or 'LOG'} - {message}"
+        )
+        print(line, flush=True)
+        self.printed_bytes[run_id] = self.printed_bytes.get(run_id, 0) + len(line) + 1
+        if self.is_truncated(run_id):
+            print(
+                f"[{run_id[:8]}] Stopped printing events after {self.max_bytes} bytes, see"
+                f" {self.url}/{self.deployment}/runs/{run_id} for the full event log",
+                flush=True,
+            )
+
+
+def poll_intervals(strategy: str, interval: float) -> Iterator[float]:
+    """Yields the time to sleep before each status request.
+
+    The fixed strategy always waits interval. The backoff strategy starts at
+    INITIAL_INTERVAL_SECONDS and grows by BACKOFF_FACTOR up to interval, each sleep randomly
+    shortened by up to a quarter so concurrent waiters spread their requests.
+    """
+    if strategy == "fixed":
+        while True:
+            yield interval
+    next_interval = min(INITIAL_INTERVAL_SECONDS, interval)
+    while True:
+        yield next_interval * random.uniform(0.75, 1.0)
+        next_interval = min(next_interval * BACKOFF_FACTOR, interval)
+
+
+async def wait_for_runs(
+    fetch_statuses: Callable[[List[str]], Dict[str, str]],
+    run_ids: List[str],
+    intervals: Iterator[float],
+) -> Dict[str, str]:
+    """Polls fetch_statuses until all runs finished, sleeping intervals between requests.
+
+    fetch_statuses is called with the unfinished run IDs. A source that blocks until a status
+    changes, such as a long poll, can be used with intervals of 0.
+    """
+    statuses: Dict[str, str] = {}
+    requests = 0
+    start = time.monotonic()
+    while True:
+        pending = [run_id for run_id in run_ids if statuses.get(run_id) not in TERMINAL_STATUSES]
+        if not pending:
+            print(
+                f"Waited {time.monotonic() - start:.0f}s for {len(run_ids)} runs"
+                f" with {requests} status requests",
+                flush=True,
+            )
+            return statuses
+        await asyncio.sleep(next(intervals))
+        requests += 1
+        try:
+            latest = await asyncio.to_thread(fetch_statuses, pending)
+        except Exception as e:
+            # keep polling, the runs are not affected by a failed status request
+            print(f"Could not fetch run statuses, retrying: {e}", flush=True)
+            latest = {}
+        for run_id, status in latest.items():
+            if statuses.get(run_id) != status:
+                print(f"Run {run_id} is {status}", flush=True)
+            statuses[run_id] = status
+
+
+async def main() -> int:
+    url = os.environ["DAGSTER_CLOUD_URL"]
+    deployment = os.getenv("INPUT_DEPLOYMENT") or "prod"
+    wait = os.getenv("INPUT_WAIT", "").lower() in ("true", "1", "yes", "on")
+    if os.getenv("INPUT_INTERVAL") and not wait:
+        print("ERROR: interval parameter can only be used when wait is true", flush=True)
+        return 1
+    interval = float(os.getenv("INPUT_INTERVAL") or DEFAULT_INTERVAL_SECONDS)
+    strategy = os.getenv("INPUT_WAIT_STRATEGY") or "fixed"
+    if strategy not in ("fixed", "backoff"):
+        print(f"ERROR: unknown wait_strategy {strategy}, use fixed or backoff", flush=True)
+        return 1
+    event_tail = None
+    if os.getenv("INPUT_STREAM_EVENTS", "").lower() in ("true", "1", "yes", "on"):
+        max_bytes = int(os.getenv("INPUT_MAX_EVENT_BYTES") or DEFAULT_MAX_EVENT_BYTES)
+        event_tail = EventTail(url, deployment, max_bytes)
+
+    def fetch_statuses(pending: List[str]) -> Dict[str, str]:
+        statuses = query_run_statuses(url, deployment, pending)
+        if event_tail:
+            # after the statuses, so the events of runs that just finished are complete
+            try:
+                event_tail.fetch(pending)
+            except Exception as e:
+                print(f"Could not fetch run events: {e}", flush=True)
+        return statuses
+
+    specs = load_job_specs()
+    run_ids = await asyncio.gather(*(launch(spec, url, deployment) for spec in specs))
+    launched = [run_id for run_id in run_ids if run_id]
+
+    if wait and launched:
+        statuses = await wait_for_runs(fetch_statuses, launched, poll_intervals(strategy, interval))
+        if event_tail:
+            print(f"Fetched run events with {event_tail.requests} requests", flush=True)
+    else:
+        statuses = {run_id: "LAUNCHED" for run_id in launched}
+
+    print("Job                                      Run                                   Status")
+    for spec, run_id in zip(specs, run_ids):
+        status = statuses.get(run_id, "") if run_id else "NOT LAUNCHED"
+        print(f"{spec['job_name']:<40} {run_id or '-':<37} {status}")
+
+    with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+        f.write(f"run_id={launched[0] if launched else ''}\n")
+        f.write(f"run_statuses={json.dumps(statuses)}\n")
+
+    if len(launched) < len(specs):
+        return 1
+    if wait and any(status != "SUCCESS" for status in statuses.values()):
+        print("::error::Not all runs succeeded", flush=True)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
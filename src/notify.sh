@@ -12,15 +12,8 @@ if [ -z $INPUT_LOCATION_NAME ]; then
     INPUT_LOCATION_NAME="${INPUT_NAME}"
 fi
 
-PR_URL="${GITHUB_SERVER_URL}/${GITHUB_REPOSITORY}/pull/${INPUT_PR}"
-export GITHUB_RUN_URL="${GITHUB_SERVER_URL}/${GITHUB_REPOSITORY}/actions/runs/${GITHUB_RUN_ID}"
-
-COMMENTS_URL="${PR_URL}/comments"
-
-# Generate cloud URL, which might be directly supplied as env var or input, or generate from org ID
-if [ -z $DAGSTER_CLOUD_URL ]; then
-  export DAGSTER_CLOUD_URL="https://dagster.cloud/${INPUT_ORGANIZATION_ID}"
-fi
+source /ci_env.sh
+export GITHUB_RUN_URL="${RUN_URL}"
 
 export INPUT_LOCATION_NAME=$INPUT_LOCATION_NAME
 python /create_or_update_comment.py
\ No newline at end of file
@@ -1,31 +1,111 @@
-import sys
-import yaml
+import argparse
+import fnmatch
 import json
 import os
+import subprocess
+import sys
+from typing import List, Optional
 
+import workspace
 
-def parse_workspace(dagster_cloud_file):
-    workspace = dagster_cloud_file
+
+def parse_workspace(dagster_cloud_file, base_ref=None, watch_paths=()):
     secrets_set = bool(os.getenv("DAGSTER_CLOUD_API_TOKEN"))
 
-    with open(workspace) as f:
-        workspace_contents = f.read()
-    workspace_contents_yaml = yaml.safe_load(workspace_contents)
+    locations = workspace.load_locations(dagster_cloud_file)
+    if base_ref:
+        locations = filter_changed_locations(dagster_cloud_file, locations, base_ref, watch_paths)
 
     output_obj = [
         {
-            "name": location["location_name"],
-            "directory": location.get("build", {"directory": "."}).get("directory"),
-            "build_folder": location.get("build", {"directory": "."}).get("directory"),
-            "registry": location.get("build", {"directory": "."}).get("registry"),
-            "location_file": str(workspace),
+            "name": location.name,
+            "directory": location.directory,
+            "build_folder": location.directory,
+            "registry": location.registry,
+            "location_file": str(dagster_cloud_file),
         }
-        for location in workspace_contents_yaml["locations"]
+        for location in locations
     ]
     print(f"build_info={json.dumps(output_obj)}")
+    # a matrix over an empty build_info fails the workflow, so deploy jobs check this first
+    print(f"has_changes={json.dumps(bool(output_obj))}")
     print(f"secrets_set={json.dumps(secrets_set)}")
 
 
+def filter_changed_locations(
+    dagster_cloud_file, locations: List[workspace.WorkspaceLocation], base_ref, watch_paths=()
+) -> List[workspace.WorkspaceLocation]:
+    """Returns the locations with changes since base_ref.
+
+    Paths in build.directory and watch_paths are relative to dagster_cloud.yaml. All locations are
+    returned if dagster_cloud.yaml or any watched path changed, or if the changes are unknown.
+    """
+    base_dir = os.path.dirname(os.path.abspath(dagster_cloud_file))
+    changed = get_changed_paths(base_dir, base_ref)
+    if changed is None:
+        print(f"Could not compare with {base_ref}, including all locations", file=sys.stderr)
+        return locations
+
+    def is_changed(path):
+        return any(path_matches(changed_path, path) for changed_path in changed)
+
+    shared_paths = [os.path.basename(dagster_cloud_file), *watch_paths]
+    if any(is_changed(path) for path in shared_paths):
+        print("Shared files changed, including all locations", file=sys.stderr)
+        return locations
+
+    changed_locations = [location for location in locations if is_changed(location.directory)]
+    print(
+        f"{len(changed_locations)} of {len(locations)} locations changed since {base_ref}:",
+        ", ".join(location.name for location in changed_locations) or "none",
+        file=sys.stderr,
+    )
+    return changed_locations
+
+
+def path_matches(changed_path, path) -> bool:
+    """Whether changed_path is path, is inside the directory path, or matches the glob path."""
+    path = os.path.normpath(path)
+    if any(char in path for char in "*?["):
+        return fnmatch.fnmatch(changed_path, path)
+    return path == "." or changed_path == path or changed_path.startswith(path + os.sep)
+
+
+def get_changed_paths(base_dir, base_ref) -> Optional[List[str]]:
+    """Returns the paths changed between base_ref and HEAD, relative to base_dir.
+
+    Uses the merge base of base_ref and HEAD, so for pull requests only the changes made on the
+    branch are included.
+    """
+    try:
+        repo_root = subprocess.check_output(
+            ["git", "rev-parse", "--show-toplevel"], cwd=base_dir, encoding="utf-8"
+        ).strip()
+        output = subprocess.check_output(
+            ["git", "diff", "--name-only", "--no-renames", "-z", f"{base_ref}...HEAD"],
+            cwd=repo_root,
+            encoding="utf-8",
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [
+        os.path.relpath(os.path.join(repo_root, path), base_dir)
+        for path in output.split("\0")
+        if path
+    ]
+
+
 if __name__ == "__main__":
-    dagster_cloud_yaml_file = sys.argv[1]
-    parse_workspace(dagster_cloud_yaml_file)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dagster_cloud_file")
+    parser.add_argument(
+        "--base-ref", help="Only include locations with changes since this git ref or commit"
+    )
+    parser.add_argument(
+        "--watch-path",
+        action="append",
+        default=[],
+        help="Path or glob that includes all locations when changed, eg shared code",
+    )
+    args = parser.parse_args()
+    parse_workspace(args.dagster_cloud_file, args.base_ref, args.watch_path)
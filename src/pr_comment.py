@@ -0,0 +1,226 @@
+import datetime
+import http.client
+import json
+import os
+import threading
+import urllib.parse
+from typing import Dict, Optional, Tuple
+
+"""
+Creates or updates a single build status comment for all locations on a Pull Request.
+
+Unlike create_or_update_comment.py, this runs in process and only uses the standard library, so
+it can be imported by deploy_pex.py. One connection to the GitHub API is reused for all updates,
+the PR comments are listed at most once per update, and every location is rendered into one
+table instead of one comment edit per location.
+"""
+
+SUCCESS_IMAGE_URL = (
+    "https://raw.githubusercontent.com/dagster-io/dagster-cloud-action/main/assets/success.png"
+)
+PENDING_IMAGE_URL = (
+    "https://raw.githubusercontent.com/dagster-io/dagster-cloud-action/main/assets/pending.png"
+)
+FAILED_IMAGE_URL = (
+    "https://raw.githubusercontent.com/dagster-io/dagster-cloud-action/main/assets/failed.png"
+)
+
+# Identifies the consolidated comment, so we don't pick up per-location comments
+COMMENT_MARKER = "<!-- dagster-cloud-action:locations -->"
+BOT_LOGIN = "github-actions[bot]"
+PER_PAGE = 100
+TIMEOUT_SECONDS = 30
+# safe to send again when the connection drops before the response arrives
+IDEMPOTENT_METHODS = ("GET", "PATCH")
+
+
+class PullRequestComment:
+    def __init__(
+        self,
+        repository: str,
+        pr_number: str,
+        token: str,
+        org_url: str,
+        run_url: str,
+        api_url: str = "https://api.github.com",
+    ):
+        self.repository = repository
+        self.pr_number = pr_number
+        self.token = token
+        self.org_url = org_url
+        self.run_url = run_url
+        self.api_url = urllib.parse.urlparse(api_url)
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._comment_id: Optional[int] = None
+        self._lock = threading.Lock()
+        # the statuses to render next, older ones not rendered yet are dropped
+        self._latest: Optional[Tuple[str, Dict[str, str]]] = None
+        self._worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, pr_number: Optional[str]) -> Optional["PullRequestComment"]:
+        if not pr_number:
+            print("Not in a pull request, will not post PR comment", flush=True)
+            return None
+        token = os.getenv("GITHUB_TOKEN")
+        if not token:
+            print("No GITHUB_TOKEN set, will not post PR comment", flush=True)
+            return None
+        server_url = os.getenv("GITHUB_SERVER_URL", "https://github.com")
+        repository = os.environ["GITHUB_REPOSITORY"]
+        return cls(
+            repository=repository,
+            pr_number=pr_number,
+            token=token,
+            org_url=os.getenv("DAGSTER_CLOUD_URL", ""),
+            run_url=f'{server_url}/{repository}/actions/runs/{os.getenv("GITHUB_RUN_ID")}',
+            api_url=os.getenv("GITHUB_API_URL", "https://api.github.com"),
+        )
+
+    def update(self, deployment_name: str, statuses: Dict[str, str], wait: bool = True):
+        """Renders all location statuses into the PR comment.
+
+        statuses maps location name to one of "pending", "success", "failed". Updates are made by a
+        single background thread, which always renders the latest statuses, so an older update never
+        overwrites a newer one. With wait=False the update overlaps with the deploy, otherwise this
+        returns once the comment shows these statuses or a newer version of them.
+        """
+        with self._lock:
+            self._latest = (deployment_name, dict(statuses))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, daemon=True)
+                self._worker.start()
+            worker = self._worker
+        if wait:
+            worker.join()
+
+    def wait(self):
+        with self._lock:
+            worker = self._worker
+        if worker is not None:
+            worker.join()
+
+    def _work(self):
+        while True:
+            with self._lock:
+                if self._latest is None:
+                    self._worker = None
+                    return
+                deployment_name, statuses = self._latest
+                self._latest = None
+            self._update(deployment_name, statuses)
+
+    def _update(self, deployment_name: str, statuses: Dict[str, str]):
+        try:
+            body = self.render(deployment_name, statuses)
+            if self._comment_id is None:
+                self._comment_id = self._find_comment_id()
+            if self._comment_id is None:
+                comment = self._request(
+                    "POST",
+                    f"/repos/{self.repository}/issues/{self.pr_number}/comments",
+                    {"body": body},
+                )
+                self._comment_id = comment["id"]
+            else:
+                self._request(
+                    "PATCH",
+                    f"/repos/{self.repository}/issues/comments/{self._comment_id}",
+                    {"body": body},
+                )
+        except (OSError, http.client.HTTPException, ValueError) as err:
+            self._close()
+            print(f"Ignoring failure to update PR comment: {err}", flush=True)
+
+    def render(self, deployment_name: str, statuses: Dict[str, str]) -> str:
+        time_str = datetime.datetime.now(datetime.timezone.utc).strftime(
+            "%b %d, %Y at %I:%M %p (%Z)"
+        )
+        deployment_url = f"{self.org_url}/{deployment_name}/home"
+        rows = []
+        for location_name, action in sorted(statuses.items()):
+            message = f"[View in Cloud]({deployment_url})"
+            image_url = SUCCESS_IMAGE_URL
+            if action == "pending":
+                message = f"[Building...]({self.run_url})"
+                image_url = PENDING_IMAGE_URL
+            elif action == "failed":
+                message = f"[Deploy failed]({self.run_url})"
+                image_url = FAILED_IMAGE_URL
+            status_image = f'[<img src="{image_url}" width=25 height=25/>]({self.run_url})'
+            rows.append(f"| `{location_name}` | {status_image} | {message} | {time_str} |")
+
+        return "\n".join(
+            [
+                COMMENT_MARKER,
+                "Your pull request is automatically being deployed to Dagster Cloud.",
+                "",
+                "| Location          | Status          | Link    | Updated         |",
+                "| ----------------- | --------------- | ------- | --------------- |",
+                *rows,
+            ]
+        )
+
+    def _find_comment_id(self) -> Optional[int]:
+        page = 1
+        while True:
+            comments = self._request(
+                "GET",
+                f"/repos/{self.repository}/issues/{self.pr_number}/comments"
+                f"?per_page={PER_PAGE}&page={page}",
+            )
+            for comment in comments:
+                if comment["user"]["login"] == BOT_LOGIN and COMMENT_MARKER in comment["body"]:
+                    return comment["id"]
+            if len(comments) < PER_PAGE:
+                return None
+            page += 1
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            conn_class = (
+                http.client.HTTPSConnection
+                if self.api_url.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            self._conn = conn_class(self.api_url.netloc, timeout=TIMEOUT_SECONDS)
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _request(self, method: str, path: str, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        retry = method in IDEMPOTENT_METHODS
+        if not retry:
+            # a kept-alive connection may have been closed while idle, and this request can't be
+            # sent again, since the server may have received it
+            self._close()
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(
+                    method,
+                    self.api_url.path.rstrip("/") + path,
+                    body=body,
+                    headers={
+                        "Accept": "application/vnd.github+json",
+                        "Authorization": f"Bearer {self.token}",
+                        "Content-Type": "application/json",
+                        "User-Agent": "dagster-cloud-action",
+                    },
+                )
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                # GitHub closes idle keep-alive connections, eg during a long build, so the first
+                # request after that fails before reaching the server. Reconnect and retry once.
+                self._close()
+                if attempt or not retry:
+                    raise
+        if response.status >= 400:
+            raise ValueError(f"GitHub API {method} {path} returned {response.status}: {data!r}")
+        return json.loads(data) if data else None
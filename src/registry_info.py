@@ -0,0 +1,154 @@
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+import action_cache
+import ci_context
+
+"""
+Loads the serverless registry information and ECR credentials into $GITHUB_ENV.
+
+Retries `dagster-cloud serverless registry-info` with exponential backoff and jitter while the
+serverless deployment is activating.
+
+The fetched values are stored in the shared action cache directory (see action_cache.py),
+encrypted with the Dagster Cloud API token, so that other steps and jobs of the same workflow run
+can reuse them instead of calling the API again. Jobs share the directory through actions/cache,
+keyed by the run ID, see actions/utils/registry_info. Only workflows with the API token can
+decrypt the cached credentials, which are reused for at most MAX_AGE_SECONDS, well within the
+lifetime of ECR credentials.
+"""
+
+MAX_ATTEMPTS = 6
+INITIAL_DELAY_SECONDS = 2
+MAX_DELAY_SECONDS = 30
+MAX_AGE_SECONDS = 4 * 60 * 60
+
+GITHUB_ENV_NAMES = ("REGISTRY_URL", "AWS_ECR_USERNAME", "AWS_ECR_PASSWORD", "AWS_DEFAULT_REGION")
+OPTIONAL_GITHUB_ENV_NAMES = ("CUSTOM_BASE_IMAGE_ALLOWED",)
+
+
+def parse_registry_info(output: str) -> Dict[str, str]:
+    info = {}
+    for line in output.splitlines():
+        name, sep, value = line.strip().partition("=")
+        if sep:
+            info[name] = value
+    return info
+
+
+def fetch_registry_info(url: str) -> Dict[str, str]:
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        print("Fetching registry info", flush=True)
+        proc = subprocess.run(
+            [
+                "dagster-cloud",
+                "serverless",
+                "registry-info",
+                "--url",
+                url,
+                "--api-token",
+                os.getenv("DAGSTER_CLOUD_API_TOKEN", ""),
+            ],
+            capture_output=True,
+            encoding="utf-8",
+            check=False,
+        )
+        info = parse_registry_info(proc.stdout)
+        if info.get("AWS_ECR_PASSWORD"):
+            return info
+        if attempt == MAX_ATTEMPTS:
+            break
+        # the jitter keeps matrix jobs that start together from retrying together
+        delay = min(MAX_DELAY_SECONDS, INITIAL_DELAY_SECONDS * 2 ** (attempt - 1))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        print(
+            "Could not load registry information - your serverless deployment may still be"
+            f" activating. Retrying in {delay:.0f} s",
+            flush=True,
+        )
+        time.sleep(delay)
+    return {}
+
+
+def get_cache_path(url: str) -> str:
+    # the token is part of the key, so a different token never reads another token's file
+    key = hashlib.sha256(
+        f"{url}\0{os.getenv('DAGSTER_CLOUD_API_TOKEN', '')}".encode("utf-8")
+    ).hexdigest()
+    return os.path.join(action_cache.cache_dir("registry-info"), key[:32] + ".enc")
+
+
+def openssl(args, data: bytes) -> Optional[bytes]:
+    try:
+        proc = subprocess.run(
+            ["openssl", "enc", "-aes-256-cbc", "-pbkdf2", "-pass", "env:DAGSTER_CLOUD_API_TOKEN"]
+            + args,
+            input=data,
+            capture_output=True,
+            check=False,
+        )
+    except OSError:
+        return None
+    return proc.stdout if proc.returncode == 0 else None
+
+
+def load_cached(url: str) -> Dict[str, str]:
+    path = get_cache_path(url)
+    if not os.getenv("DAGSTER_CLOUD_API_TOKEN") or not os.path.isfile(path):
+        return {}
+    if time.time() - os.path.getmtime(path) > MAX_AGE_SECONDS:
+        return {}
+    with open(path, "rb") as f:
+        decrypted = openssl(["-d"], f.read())
+    if not decrypted:
+        return {}
+    return parse_registry_info(decrypted.decode("utf-8"))
+
+
+def store_cached(url: str, info: Dict[str, str]):
+    if not os.getenv("DAGSTER_CLOUD_API_TOKEN"):
+        return
+    encrypted = openssl([], "".join(f"{k}={v}\n" for k, v in info.items()).encode("utf-8"))
+    if not encrypted:
+        print("Could not encrypt the registry information, it will not be reused", flush=True)
+        return
+    path = get_cache_path(url)
+    tmp_path = f"{path}.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(encrypted)
+    os.replace(tmp_path, path)
+
+
+def main():
+    url = f"{ci_context.get_dagster_cloud_url()}/{os.getenv('INPUT_DEPLOYMENT', '')}"
+    info = load_cached(url)
+    if info.get("AWS_ECR_PASSWORD"):
+        print("Reusing registry information fetched earlier in this workflow run", flush=True)
+    else:
+        info = fetch_registry_info(url)
+        if not info.get("AWS_ECR_PASSWORD"):
+            print(
+                "::error::No serverless registry information found - your serverless deployment"
+                " may still be activating.",
+                flush=True,
+            )
+            sys.exit(1)
+        store_cached(url, info)
+
+    print("Loaded registry information.")
+    print(f"::add-mask::{info['AWS_ECR_PASSWORD']}")
+    with open(os.environ["GITHUB_ENV"], "a", encoding="utf-8") as f:
+        for name in GITHUB_ENV_NAMES:
+            f.write(f"{name}={info.get(name, '')}\n")
+        for name in OPTIONAL_GITHUB_ENV_NAMES:
+            if info.get(name):
+                f.write(f"{name}={info[name]}\n")
+
+
+if __name__ == "__main__":
+    main()
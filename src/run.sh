@@ -1,6 +1,8 @@
 #!/bin/bash -
 
 # Generate cloud URL, which might be directly supplied as env var or input, or generate from org ID
+# Same rule as ci_context.get_dagster_cloud_url(). These scripts need nothing else from the CI
+# context, so it is repeated here rather than starting python for it.
 if [ -z $DAGSTER_CLOUD_URL ]; then
     if [ -z $INPUT_DAGSTER_CLOUD_URL ]; then
         export DAGSTER_CLOUD_URL="https://dagster.cloud/${INPUT_ORGANIZATION_ID}"
@@ -9,6 +11,12 @@ if [ -z $DAGSTER_CLOUD_URL ]; then
     fi
 fi
 
+# Launch several jobs at once if a list of jobs is given, and wait with backoff or print the run
+# events if requested
+if [ -n "${INPUT_JOBS}" ] || [ "${INPUT_WAIT_STRATEGY}" == "backoff" ] || [ "${INPUT_STREAM_EVENTS}" == "true" ]; then
+    exec python /launch_jobs.py
+fi
+
 # Check for wait flag - handle various true values
 wait_flag=""
 interval_flag=""
@@ -0,0 +1,45 @@
+#!/bin/bash -
+# Materializes the venv of the action's dagster-cloud PEX ahead of time.
+#
+# The PEX is built with --venv=prepend --sh-boot, so every invocation on a fresh runner extracts a
+# venv into PEX_ROOT and then compiles bytecode as modules are imported. This uses a PEX_ROOT keyed
+# by the content hash of the PEX, which can be restored with actions/cache, and compiles all
+# bytecode up front so later invocations just exec the venv's python.
+#
+# Usage:
+#   setup_pex_venv.sh key <path-to-pex>
+#       Exports PEX_ROOT and DAGSTER_CLOUD_PEX to $GITHUB_ENV and writes the `key` and `path`
+#       outputs to use with actions/cache.
+#   setup_pex_venv.sh warm
+#       Extracts the venv into PEX_ROOT and compiles its bytecode.
+
+set -o errexit
+
+case "$1" in
+    key)
+        PEX_PATH=$(realpath "$2")
+        PEX_HASH=$(sha256sum "$PEX_PATH" | cut -c1-20)
+        PEX_ROOT="${RUNNER_TEMP}/_github_home/.cache/dagster-cloud-action/pex-root/${PEX_HASH}"
+        mkdir -p "$PEX_ROOT"
+
+        echo "PEX_ROOT=${PEX_ROOT}" >> $GITHUB_ENV
+        echo "DAGSTER_CLOUD_PEX=${PEX_PATH}" >> $GITHUB_ENV
+        # the venv links to the runner's python, so the cache is specific to the runner image
+        echo "key=dagster-cloud-pex-${RUNNER_OS}-${RUNNER_ARCH}-${ImageOS}-${PEX_HASH}" >> $GITHUB_OUTPUT
+        echo "path=${PEX_ROOT}" >> $GITHUB_OUTPUT
+        ;;
+    warm)
+        SECONDS=0
+        PEX_INTERPRETER=1 "$DAGSTER_CLOUD_PEX" -c "
+import compileall, sys, sysconfig
+for path in sorted({sysconfig.get_paths()['purelib'], sysconfig.get_paths()['platlib']}):
+    compileall.compile_dir(path, quiet=1, workers=0)
+print('Compiled PEX venv at', sys.prefix)
+"
+        echo "Prepared PEX venv in ${SECONDS}s"
+        ;;
+    *)
+        echo "Usage: $0 key <path-to-pex> | warm"
+        exit 2
+        ;;
+esac
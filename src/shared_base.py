@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+# Prepares a base image with the requirements shared by the code locations of a workspace, so they
+# are installed once instead of by the build of every location.
+#
+# Reads the requirements.txt of each location in dagster_cloud.yaml and keeps the requirements
+# listed by all locations that have one. Pip options (-r, -e, --index-url, ...) are left to the
+# locations. The image is tagged with a hash of the base image, the PIP_* env vars and the shared
+# requirements, so it is only built again when one of them changes. The generated Dockerfile of
+# each location then starts FROM the shared base image, see generate_dockerfile.py, and pip only
+# installs the location's own extras.
+#
+# Usage:
+#   python shared_base.py <dagster_cloud.yaml> --registry <registry> --output-dir <dir>
+#
+# Writes the build context of the shared base image to --output-dir and prints `image=<image>`,
+# empty when fewer than two locations share requirements, and `exists=true|false`, meant to be
+# appended to $GITHUB_OUTPUT. Reads the base image from $INPUT_BASE_IMAGE and the env vars from
+# $INPUT_ENV_VARS, like generate_dockerfile.py.
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import List, Optional, Set
+
+import generate_dockerfile
+import image_tag
+import workspace
+
+TAG_PREFIX = generate_dockerfile.SHARED_BASE_TAG_PREFIX
+HASH_LENGTH = 24
+
+
+def parse_requirements(path: str) -> Optional[Set[str]]:
+    if not os.path.isfile(path):
+        return None
+    requirements = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = re.sub(r"(^|\s)#.*", "", line).strip()
+            if not line or line.startswith("-"):
+                continue
+            # `dagster == 1.5` and `dagster==1.5` are the same requirement
+            requirements.add(re.sub(r"\s+", "", line))
+    return requirements
+
+
+def shared_requirements(dagster_cloud_file: str) -> List[str]:
+    base_dir = os.path.dirname(os.path.abspath(dagster_cloud_file))
+    location_requirements = {}
+    for location in workspace.load_locations(dagster_cloud_file):
+        requirements = parse_requirements(
+            os.path.join(base_dir, location.directory, generate_dockerfile.REQUIREMENTS_FILE)
+        )
+        if requirements is not None:
+            location_requirements[location.name] = requirements
+
+    if len(location_requirements) < 2:
+        print("Fewer than two locations have a requirements.txt, no shared base", file=sys.stderr)
+        return []
+    shared = set.intersection(*location_requirements.values())
+    print(
+        f"{len(shared)} requirements shared by {', '.join(location_requirements)}",
+        file=sys.stderr,
+    )
+    return sorted(shared)
+
+
+def shared_base_tag(base_image: str, pip_env_vars: dict, requirements: List[str]) -> str:
+    digest = hashlib.sha256()
+    for value in [base_image, json.dumps(pip_env_vars, sort_keys=True), *requirements]:
+        digest.update(value.encode("utf-8") + b"\0")
+    return f"{TAG_PREFIX}-{digest.hexdigest()[:HASH_LENGTH]}"
+
+
+def write_build_context(
+    output_dir: str, base_image: str, pip_env_vars: dict, requirements: List[str]
+):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(
+        os.path.join(output_dir, generate_dockerfile.REQUIREMENTS_FILE), "w", encoding="utf-8"
+    ) as f:
+        f.write("".join(f"{requirement}\n" for requirement in requirements))
+
+    lines = [f"FROM {base_image}"]
+    if pip_env_vars:
+        lines.append(generate_dockerfile.format_env(pip_env_vars))
+    lines += [
+        f"WORKDIR {generate_dockerfile.DEPS_DIR}",
+        f"COPY {generate_dockerfile.REQUIREMENTS_FILE} ./",
+        f"RUN {generate_dockerfile.PIP_CACHE_MOUNT} pip install"
+        f" -r {generate_dockerfile.REQUIREMENTS_FILE}",
+    ]
+    with open(os.path.join(output_dir, "Dockerfile"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dagster_cloud_file")
+    parser.add_argument("--registry", required=True)
+    parser.add_argument("--output-dir", required=True)
+    args = parser.parse_args()
+
+    requirements = shared_requirements(args.dagster_cloud_file)
+    if not requirements:
+        print("image=")
+        print("exists=false")
+        sys.exit(0)
+
+    # stdout is the step's output, messages go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        base_image = generate_dockerfile.get_base_image()
+    env_vars = json.loads(os.getenv("INPUT_ENV_VARS") or "{}")
+    pip_env_vars = {k: v for k, v in env_vars.items() if k.startswith("PIP_")}
+    write_build_context(args.output_dir, base_image, pip_env_vars, requirements)
+
+    image = f"{args.registry}:{shared_base_tag(base_image, pip_env_vars, requirements)}"
+    exists = image_tag.image_exists(image)
+    if exists:
+        print(f"Found {image}, skipping the build", file=sys.stderr)
+    print(f"image={image}")
+    print(f"exists={'true' if exists else 'false'}")
@@ -0,0 +1,83 @@
+import codecs
+import collections
+import os
+import re
+import subprocess
+import sys
+import threading
+from typing import Callable, List, Optional, Pattern, Tuple, Union
+
+"""
+Runs a command, streaming its combined stdout and stderr to our stdout.
+
+Output is read in large chunks and flushed once per chunk instead of once per line. Only the last
+lines are kept in memory, which is what error reporting needs. Callers that need to find something
+in the output pass a matcher, which sees every complete line as it is streamed.
+"""
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_TAIL_LINES = 500
+
+# serializes output of concurrent commands so prefixed lines are not interleaved
+OUTPUT_LOCK = threading.Lock()
+
+
+class FirstMatch:
+    """A matcher that remembers the first line matching pattern, stripped of whitespace."""
+
+    def __init__(self, pattern: Union[str, Pattern]):
+        self.pattern = re.compile(pattern)
+        self.value: Optional[str] = None
+
+    def __call__(self, line: str):
+        if self.value is None and self.pattern.match(line):
+            self.value = line.strip()
+
+
+def run(
+    args,
+    prefix: str = "",
+    matcher: Optional[Callable[[str], None]] = None,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+) -> Tuple[int, List[str]]:
+    """Runs args and returns the exit code and the last tail_lines lines of output.
+
+    Every printed line starts with prefix, which identifies the command when run concurrently.
+    """
+    with OUTPUT_LOCK:
+        print(f"{prefix}Running", args, flush=True)
+    popen = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    tail = collections.deque(maxlen=tail_lines)
+    partial = ""
+    fd = popen.stdout.fileno()
+    while True:
+        chunk = os.read(fd, CHUNK_SIZE)
+        text = partial + decoder.decode(chunk, final=not chunk)
+        if chunk:
+            # hold back an incomplete last line until the rest of it arrives
+            complete, newline, partial = text.rpartition("\n")
+            text = complete + newline
+        else:
+            partial = ""
+        lines = text.splitlines(keepends=True)
+        if lines:
+            if matcher:
+                for line in lines:
+                    matcher(line)
+            tail.extend(lines)
+            write_lines(lines, prefix)
+        if not chunk:
+            break
+    popen.stdout.close()
+    returncode = popen.wait()
+    return returncode, list(tail)
+
+
+def write_lines(lines: List[str], prefix: str):
+    text = "".join(prefix + line for line in lines) if prefix else "".join(lines)
+    if not text.endswith("\n"):
+        text += "\n"
+    with OUTPUT_LOCK:
+        sys.stdout.write(text)
+        sys.stdout.flush()
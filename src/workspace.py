@@ -0,0 +1,74 @@
+import hashlib
+import os
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+import yaml
+
+import action_cache
+
+"""
+Loads the code locations from dagster_cloud.yaml.
+
+This is the one place that parses dagster_cloud.yaml for the action's scripts. The C libyaml
+loader is used when available, and the parsed locations are cached on disk keyed by a hash of the
+file contents, so steps after the first one that load the same file skip parsing.
+"""
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# bump when the cached format changes
+CACHE_VERSION = "1"
+
+
+@dataclass(frozen=True)
+class WorkspaceLocation:
+    name: str
+    # the build directory relative to dagster_cloud.yaml
+    directory: str
+    registry: Optional[str]
+
+
+def load_locations(dagster_cloud_file: str) -> List[WorkspaceLocation]:
+    with open(dagster_cloud_file, "rb") as f:
+        contents = f.read()
+    cache_path = get_cache_path(contents)
+    cached = action_cache.load_json(cache_path) if cache_path else None
+    if cached is not None:
+        return [WorkspaceLocation(**location) for location in cached]
+
+    locations = parse_locations(contents)
+    if cache_path:
+        try:
+            action_cache.store_json(cache_path, [asdict(location) for location in locations])
+        except OSError:
+            pass
+    return locations
+
+
+def parse_locations(contents: bytes) -> List[WorkspaceLocation]:
+    workspace_yaml = yaml.load(contents, Loader=SafeLoader)
+    locations = []
+    for location in workspace_yaml["locations"]:
+        build = location.get("build") or {}
+        locations.append(
+            WorkspaceLocation(
+                name=location["location_name"],
+                directory=build.get("directory") or ".",
+                registry=build.get("registry"),
+            )
+        )
+    return locations
+
+
+def get_cache_path(contents: bytes) -> Optional[str]:
+    key = hashlib.sha256(CACHE_VERSION.encode("utf-8") + b"\0" + contents).hexdigest()
+    try:
+        return os.path.join(action_cache.cache_dir("workspace"), f"{key}.json")
+    except OSError:
+        return None
+
+
+def get_location_directory(dagster_cloud_file: str, location: WorkspaceLocation) -> str:
+    """Returns the absolute build directory of location."""
+    base_dir = os.path.dirname(os.path.abspath(dagster_cloud_file))
+    return os.path.join(base_dir, location.directory)
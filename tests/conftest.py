@@ -1,9 +1,12 @@
 import importlib
+import json
 import logging
 import os
 import subprocess
 import sys
 import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Dict
 from unittest import mock
@@ -160,11 +163,72 @@ def exec_context(tmp_path):
     yield ExecContext(tmp_dir=tmp_path)
 
 
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """Answers every request with the server's respond(handler), see http_server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.payload = json.loads(self.rfile.read(length)) if length else None
+        response = self.server.respond(self)
+        if response is None:
+            self.close_connection = True
+            return
+        status, obj = response
+        body = json.dumps(obj).encode() if obj is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_PATCH = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="function")
+def http_server():
+    """Starts fake JSON APIs on localhost, for scripts that call GitHub or Dagster Cloud.
+
+    Call it with respond(request), which gets the request handler, with the parsed JSON body as
+    request.payload, and returns (status, JSON response), or None to drop the connection without
+    responding. Setting request.close_connection closes a kept-alive connection after responding.
+    Returns the server, whose url attribute is its base URL.
+    """
+    servers = []
+
+    def start(respond):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPIHandler)
+        server.daemon_threads = True
+        server.respond = respond
+        server.url = f"http://127.0.0.1:{server.server_port}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
 @pytest.fixture(scope="session")
 def repo_root():
     return Path(os.path.abspath(__file__)).parents[1]
 
 
+@pytest.fixture(scope="function")
+def src_module(repo_root):
+    """Imports a module of src/, for in-process testing of the action's Python scripts."""
+    sys.path.insert(0, str(repo_root / "src"))
+    try:
+        yield importlib.import_module
+    finally:
+        sys.path.remove(str(repo_root / "src"))
+
+
 @pytest.fixture(scope="session")
 def action_docker_image_id(repo_root):
     """Build a docker image using local source and return the tag"""
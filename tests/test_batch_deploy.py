@@ -0,0 +1,72 @@
+import json
+import os
+
+import yaml
+
+
+def test_batch_deploy(repo_root, exec_context, tmp_path):
+    # a fake PEX that logs the CLI commands it is asked to run, and the location file of ci init
+    fake_pex = tmp_path / "dagster-cloud.pex"
+    fake_pex.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> {tmp_path}/cli.log\n'
+        'if [ "$4" = init ]; then\n'
+        f'  cat "${{5#--project-dir=}}/${{6#--dagster-cloud-yaml-path=}}" > {tmp_path}/deployed.yaml\n'
+        "fi\n"
+    )
+    os.chmod(fake_pex, 0o755)
+    (tmp_path / "project").mkdir()
+    workspace = {
+        "locations": [
+            {"location_name": "a", "code_source": {"package_name": "a"}},
+            {"location_name": "b", "build": {"directory": "b", "registry": "old-registry"}},
+        ]
+    }
+    (tmp_path / "project" / "dagster_cloud.yaml").write_text(yaml.dump(workspace))
+    build_outputs = tmp_path / "build-outputs"
+    build_outputs.mkdir()
+    for name in ["a", "b"]:
+        location = {
+            "name": name,
+            "directory": name,
+            "build_folder": name,
+            # eg the registry input of the deploy action rather than dagster_cloud.yaml
+            "registry": "registry",
+            "location_file": "project/dagster_cloud.yaml",
+            "image_tag": f"tag-{name}",
+        }
+        (build_outputs / f"{name}.json").write_text(json.dumps(location))
+
+    exec_context.set_env(
+        {
+            "DAGSTER_CLOUD_PEX": fake_pex,
+            "GITHUB_SHA": "abc",
+            "INPUT_DAGSTER_CLOUD_URL": "https://org.dagster.cloud",
+        }
+    )
+    exec_context.run_local_command(
+        f"python {repo_root}/src/batch_deploy.py {build_outputs} --deployment=prod"
+    )
+
+    commands = [
+        line.split(" ", 2)[2] for line in exec_context.tmp_file_content("cli.log").splitlines()
+    ]
+    assert commands[0].startswith(f"ci init --project-dir={tmp_path}/project")
+    assert " --dagster-cloud-yaml-path=.dagster-batch-deploy-" in commands[0]
+    assert " --deployment=prod" in commands[0]
+    assert commands[0].endswith("--commit-hash=abc --location-name=a --location-name=b")
+    # one workspace update for all locations
+    assert commands[1:] == [
+        "ci set-build-output --location-name=a --image-tag=tag-a",
+        "ci set-build-output --location-name=b --image-tag=tag-b",
+        "ci deploy",
+        "ci status",
+    ]
+    # the locations are deployed with the registry they were pushed to
+    deployed = yaml.safe_load(exec_context.tmp_file_content("deployed.yaml"))
+    assert [location["build"]["registry"] for location in deployed["locations"]] == [
+        "registry",
+        "registry",
+    ]
+    assert deployed["locations"][1]["build"]["directory"] == "b"
+    assert os.listdir(tmp_path / "project") == ["dagster_cloud.yaml"]
@@ -0,0 +1,21 @@
+def test_branch_deployment_cache(src_module, monkeypatch, tmp_path):
+    for name, value in {
+        "DAGSTER_CLOUD_ACTION_CACHE_DIR": str(tmp_path / "cache"),
+        "DAGSTER_CLOUD_URL": "https://org.dagster.cloud",
+        "GITHUB_ACTIONS": "true",
+        "GITHUB_REPOSITORY": "org/repo",
+        "GITHUB_REF": "refs/pull/5/merge",
+        "GITHUB_SHA": "abc",
+    }.items():
+        monkeypatch.setenv(name, value)
+    branch_deployment_cache = src_module("branch_deployment_cache")
+
+    # resolved by get_branch_deployment.sh or deploy_pex.py
+    assert branch_deployment_cache.resolve(["printf", "warning\\n1234abcd\\n"]) == "1234abcd"
+    # and reused by every other caller, eg deploy.sh, without running the command again
+    assert branch_deployment_cache.get() == "1234abcd"
+    assert branch_deployment_cache.resolve(["false"]) == "1234abcd"
+
+    # other pull requests and commits have their own entries
+    monkeypatch.setenv("GITHUB_SHA", "def")
+    assert branch_deployment_cache.get() is None
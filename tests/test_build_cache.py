@@ -0,0 +1,26 @@
+def get_outputs(content):
+    """Parses multiline name<<delimiter outputs."""
+    outputs = {}
+    lines = iter(content.splitlines())
+    for line in lines:
+        name, delimiter = line.split("<<")
+        outputs[name] = list(iter(lines.__next__, delimiter))
+    return outputs
+
+
+def test_build_cache(repo_root, exec_context, tmp_path):
+    exec_context.set_env({"GITHUB_OUTPUT": tmp_path / "output.txt"})
+    exec_context.run_local_command(
+        f"python {repo_root}/src/build_cache.py --backend registry --registry registry/repo"
+        " --location my_location --branch feature/x --default-branch main"
+    )
+    outputs = get_outputs(exec_context.tmp_file_content("output.txt"))
+    # branch builds read the default branch's cache after their own
+    assert outputs["cache-from"] == [
+        "type=registry,ref=registry/repo:cache-my_location-feature-x",
+        "type=registry,ref=registry/repo:cache-my_location-main",
+    ]
+    assert outputs["cache-to"] == [
+        "type=registry,ref=registry/repo:cache-my_location-feature-x,mode=max,"
+        "image-manifest=true,oci-mediatypes=true"
+    ]
@@ -0,0 +1,70 @@
+import subprocess
+
+import pytest
+
+
+@pytest.fixture
+def build_method(src_module, monkeypatch, tmp_path):
+    monkeypatch.setenv("DAGSTER_CLOUD_ACTION_CACHE_DIR", str(tmp_path / "cache"))
+    return src_module("build_method")
+
+
+def test_plan(build_method, tmp_path):
+    location_dir = tmp_path / "location"
+    location_dir.mkdir()
+    (location_dir / "setup.py").write_text("setup(install_requires=['dagster'])\n")
+
+    def plan(ubuntu_version):
+        return build_method.plan([str(location_dir)], "3.11", ubuntu_version, root=str(tmp_path))
+
+    assert plan("22.04").method == "local"
+    # the dependencies can't be checked for sdists, so they may not build locally
+    unknown = plan("24.04")
+    assert (unknown.method, unknown.fallback) == ("docker", None)
+
+    # a recorded local build skips the check, and can still fall back to docker
+    build_method.record(unknown.key, "local")
+    cached = plan("24.04")
+    assert (cached.method, cached.fallback, cached.reason) == ("local", "docker", "cached decision")
+
+    # changing the dependencies invalidates the decision
+    (location_dir / "setup.py").write_text("setup(install_requires=['dagster', 'pandas'])\n")
+    assert plan("24.04").method == "docker"
+
+
+def test_failed_before_upload(build_method):
+    def attempt(returncode, **locations):
+        return {"returncode": returncode, "locations": locations}
+
+    built = {"build_dependencies": 1.0, "upload": 1.0}
+    assert not build_method.failed_before_upload(attempt(0, foo={"build_dependencies": 1.0}))
+    assert build_method.failed_before_upload(attempt(1, foo={"build_dependencies": 1.0}))
+    assert build_method.failed_before_upload(attempt(1, foo=built, bar={"startup": 1.0}))
+    # failures after the upload would fail with docker as well
+    assert not build_method.failed_before_upload(attempt(1, foo=built))
+
+
+def test_has_only_wheels(build_method, monkeypatch, tmp_path):
+    (tmp_path / "requirements.txt").write_text("pyyaml==6.0.1\n")
+    calls = []
+
+    def fake_pip(args, **kwargs):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+    monkeypatch.setattr(build_method.subprocess, "run", fake_pip)
+    monkeypatch.setattr(build_method.platform, "machine", lambda: "x86_64")
+    assert build_method.has_only_wheels(str(tmp_path), "3.11")
+
+    # pip only accepts the exact platform tags, so every compatible one is passed
+    platforms = [arg for arg in calls[0] if arg.startswith("--platform=")]
+    assert "--platform=manylinux2014_x86_64" in platforms
+    assert "--platform=manylinux_2_17_x86_64" in platforms
+    assert "--platform=manylinux_2_28_x86_64" in platforms
+    assert "--only-binary=:all:" in calls[0]
+
+    def failing_pip(args, **kwargs):
+        return subprocess.CompletedProcess(args, 1, stdout="", stderr="No matching distribution")
+
+    monkeypatch.setattr(build_method.subprocess, "run", failing_pip)
+    assert build_method.has_only_wheels(str(tmp_path), "3.11") is False
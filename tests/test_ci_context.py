@@ -0,0 +1,57 @@
+import shutil
+import subprocess
+
+
+def test_ci_context(repo_root, exec_context, tmp_path):
+    subprocess.run(["git", "init", "-q", tmp_path], check=True)
+    subprocess.run(
+        [
+            "git",
+            "-C",
+            tmp_path,
+            "-c",
+            "user.name=Jane Doe",
+            "-c",
+            "user.email=jane@example.com",
+            "commit",
+            "-q",
+            "--allow-empty",
+            "-m",
+            "Add 'quoted' message",
+        ],
+        check=True,
+    )
+    env = {
+        "GITHUB_ACTIONS": "true",
+        "GITHUB_SERVER_URL": "https://github.com",
+        "GITHUB_REPOSITORY": "org/repo",
+        "GITHUB_SHA": "abc",
+        "INPUT_PR": "12",
+        "INPUT_PR_STATUS": "open",
+        "INPUT_ORGANIZATION_ID": "org",
+        "RUNNER_TEMP": tmp_path,
+    }
+    command = f'eval "$(python {repo_root}/src/ci_context.py shell)" && env | sort'
+    exec_context.set_env(env)
+    exec_context.run_local_command(command)
+    output = exec_context.get_stdout().splitlines()
+    for line in [
+        "PROVIDER=github",
+        "PR_STATUS=OPEN",
+        "PR_URL=https://github.com/org/repo/pull/12",
+        "COMMIT_URL=https://github.com/org/repo/tree/abc",
+        "DAGSTER_CLOUD_URL=https://dagster.cloud/org",
+        "MESSAGE=Add 'quoted' message",
+        "NAME=Jane Doe",
+        "EMAIL=jane@example.com",
+    ]:
+        assert line in output
+
+    # later steps read the stored context instead of running git again
+    shutil.rmtree(tmp_path / ".git")
+    exec_context.reset()
+    exec_context.set_env({**env, "DAGSTER_CLOUD_URL": "https://custom.dagster.cloud"})
+    exec_context.run_local_command(command)
+    output = exec_context.get_stdout().splitlines()
+    assert "NAME=Jane Doe" in output
+    assert "DAGSTER_CLOUD_URL=https://custom.dagster.cloud" in output
@@ -0,0 +1,47 @@
+import os
+
+
+def test_cli_worker(repo_root, exec_context, tmp_path):
+    # a fake PEX that runs the system python, and a fake CLI module
+    fake_pex = tmp_path / "dagster-cloud.pex"
+    fake_pex.write_text('#!/bin/sh\nexec python "$@"\n')
+    os.chmod(fake_pex, 0o755)
+    (tmp_path / "fake_cli.py").write_text(
+        "import os, sys\n"
+        "print('args', sys.argv[1:], 'greeting', os.getenv('GREETING'), 'pid', os.getpid())\n"
+        "sys.exit(int(sys.argv[1]))\n"
+    )
+    worker = f"python {repo_root}/src/cli_worker.py"
+    (tmp_path / "commands.sh").write_text(
+        f"{worker} run -m fake_cli 0\n"
+        f"{worker} start\n"
+        "export $(cat github.env)\n"
+        f"GREETING=hello {worker} run -m fake_cli 3\n"
+        "echo exitcode=$?\n"
+        f"{worker} run -m fake_cli 0\n"
+        f"{worker} stop\n"
+    )
+    exec_context.set_env(
+        {
+            "DAGSTER_CLOUD_PEX": fake_pex,
+            "PYTHONPATH": tmp_path,
+            "RUNNER_TEMP": tmp_path,
+            "GITHUB_RUN_ID": "1",
+            "GITHUB_ENV": tmp_path / "github.env",
+        }
+    )
+    exec_context.run_local_command("bash commands.sh")
+
+    socket_path = str(tmp_path / "dagster-cloud-cli-1.sock")
+    assert f"DAGSTER_CLOUD_CLI_SOCKET={socket_path}" in exec_context.tmp_file_content("github.env")
+
+    lines = exec_context.get_stdout().splitlines()
+    outputs = [line for line in lines if line.startswith("args")]
+    assert outputs[0].startswith("args ['0'] greeting None")
+    # commands run by the worker see the client's environment and report its exit code
+    assert outputs[1].startswith("args ['3'] greeting hello")
+    assert "exitcode=3" in lines
+    # each command runs in a separate child process of the worker
+    pids = [line.split()[-1] for line in outputs]
+    assert len(set(pids)) == 3
+    assert "Started CLI worker" in exec_context.get_stdout()
@@ -0,0 +1,84 @@
+import stat
+
+
+def test_deploy_locations_concurrently(src_module, capsys):
+    deploy_pex = src_module("deploy_pex")
+    deploy_timing = src_module("deploy_timing")
+
+    def deploy_command(location_name):
+        if location_name == "missing":
+            return ["/nonexistent/dagster-cloud.pex"]
+        exitcode = 1 if location_name == "broken" else 0
+        return ["sh", "-c", f"echo deploying {location_name}; exit {exitcode}"]
+
+    locations = ["foo", "broken", "bar", "missing"]
+    statuses = {name: "pending" for name in locations}
+    status_changes = []
+    timing = deploy_timing.DeployTiming()
+    timing.start_attempt("local")
+    returncode, output = deploy_pex.deploy_locations_concurrently(
+        locations,
+        deploy_command,
+        2,
+        lambda: status_changes.append(dict(statuses)),
+        statuses,
+        timing,
+    )
+
+    # the failed location fails the deploy without hiding the others
+    assert returncode == 1
+    assert statuses == {"foo": "success", "broken": "failed", "bar": "success", "missing": "failed"}
+    assert len(status_changes) == 4
+    assert sorted(timing.attempts[0]["locations"]) == ["bar", "broken", "foo"]
+    # only the failed location's output is returned, and every line says which location it is for
+    assert "deploying broken\n" in output
+    stdout = capsys.readouterr().out
+    assert "[foo] deploying foo" in stdout and "[bar] deploying bar" in stdout
+    # a command that can't be started only fails its own location
+    assert "[missing] Failed to run deploy" in stdout
+    assert "Failed to deploy broken, missing" in stdout
+
+
+def test_main_retries_failed_locations(src_module, monkeypatch, tmp_path):
+    deploy_pex = src_module("deploy_pex")
+    build_method = src_module("build_method")
+
+    (tmp_path / "dagster_cloud.yaml").write_text(
+        "locations:\n"
+        + "".join(
+            f"  - location_name: {name}\n    code_source:\n      package_name: {name}\n"
+            for name in ["foo", "broken"]
+        )
+    )
+    # fails to build "broken" locally, before uploading it
+    fake_pex = tmp_path / "dagster-cloud.pex"
+    fake_pex.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> {tmp_path}/calls.log\n'
+        'case "$*" in *--location-name=broken*--build-method=local*|'
+        "*--build-method=local*--location-name=broken*) exit 1;; esac\n"
+        "echo Uploading Python executable for location\n"
+    )
+    fake_pex.chmod(fake_pex.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(deploy_pex, "DAGSTER_CLOUD_PEX_PATH", fake_pex)
+    monkeypatch.setattr(deploy_pex, "get_runner_ubuntu_version", lambda: "24.04")
+    monkeypatch.setattr(
+        build_method,
+        "plan",
+        lambda *args, **kwargs: build_method.BuildPlan("local", "docker", "key", "test"),
+    )
+    monkeypatch.setattr(build_method, "record", lambda key, method: None)
+    monkeypatch.setenv("GITHUB_EVENT_NAME", "push")
+    monkeypatch.setenv("INPUT_MAX_PARALLEL_DEPLOYS", "2")
+    monkeypatch.setenv("INPUT_TIMING_REPORT_PATH", str(tmp_path / "timing.json"))
+    monkeypatch.delenv("GITHUB_STEP_SUMMARY", raising=False)
+    monkeypatch.delenv("GITHUB_OUTPUT", raising=False)
+    monkeypatch.setattr("sys.argv", ["deploy_pex.py", str(tmp_path / "dagster_cloud.yaml")])
+
+    deploy_pex.main()
+
+    calls = (tmp_path / "calls.log").read_text().splitlines()
+    docker_calls = [call for call in calls if "--build-method=docker" in call]
+    # foo was deployed by the local attempt, only broken is deployed again with docker
+    assert len(calls) == 3
+    assert len(docker_calls) == 1 and "--location-name=broken" in docker_calls[0]
@@ -0,0 +1,52 @@
+import json
+
+
+def test_deploy_timing(src_module, monkeypatch, tmp_path):
+    deploy_timing = src_module("deploy_timing")
+    now = [0.0]
+    monkeypatch.setattr(deploy_timing.time, "monotonic", lambda: now[0])
+
+    def output(seconds, line):
+        now[0] += seconds
+        timer(line)
+
+    timing = deploy_timing.DeployTiming()
+    timing.start_attempt("local")
+    timer = deploy_timing.PhaseTimer(["foo", "bar"])
+    output(1, "Building Python executable for foo from directory foo\n")
+    output(2, "No published deps.pex found, building\n")
+    output(10, "Wrote deps pex\n")
+    output(3, "Building Python executable for bar from directory bar\n")
+    output(1, "Found published deps.pex\n")
+    output(2, "Uploading Python executable for bar.\n")
+    output(4, "Waiting for agent to sync changes\n")
+    output(20, "Agent synced changes\n")
+    now[0] += 1
+    timer.finish(0)
+    timing.record(timer)
+
+    locations = timing.report()["attempts"][0]["locations"]
+    assert locations["foo"] == {
+        "startup": 1.0,
+        "resolve_dependencies": 2.0,
+        "build_dependencies": 10.0,
+        "build_source": 3.0,
+        "wait_for_agent": 20.0,
+    }
+    # bar's phases start when its build starts, the shared phases count for both locations
+    assert locations["bar"] == {
+        "startup": 1.0,
+        "resolve_dependencies": 1.0,
+        "build_source": 2.0,
+        "upload": 4.0,
+        "wait_for_agent": 20.0,
+    }
+
+    monkeypatch.setenv("GITHUB_STEP_SUMMARY", str(tmp_path / "summary.md"))
+    timing.write_step_summary()
+    summary = (tmp_path / "summary.md").read_text()
+    assert "Build method `local` succeeded in 44.0s" in summary
+    assert "| `foo` | 1.0s | 2.0s | 10.0s | 3.0s | - | 20.0s |" in summary
+
+    timing.write_json(str(tmp_path / "timing.json"))
+    assert json.loads((tmp_path / "timing.json").read_text()) == timing.report()
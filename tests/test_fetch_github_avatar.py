@@ -0,0 +1,30 @@
+def test_fetch_github_avatar(repo_root, exec_context, http_server, tmp_path):
+    requests = []
+
+    def respond(request):
+        requests.append(request.path)
+        if requests[1:]:
+            # later requests are rate limited
+            return 403, None
+        return 200, {"author": {"avatar_url": "https://avatars/1"}}
+
+    server = http_server(respond)
+    env = {
+        "GITHUB_API_URL": server.url,
+        "GITHUB_REPOSITORY": "org/repo",
+        "GITHUB_SHA": "abc",
+        "RUNNER_TEMP": tmp_path,
+    }
+    command = f"python {repo_root}/src/fetch_github_avatar.py"
+    exec_context.set_env(env)
+    exec_context.run_local_command(f"{{ {command} a@example.com; {command} a@example.com; }}")
+    # the second lookup is served from the cache
+    assert exec_context.get_stdout().splitlines() == ["https://avatars/1"] * 2
+    assert requests == ["/repos/org/repo/commits/abc"]
+
+    # API errors print no avatar without failing
+    exec_context.reset()
+    exec_context.set_env(env)
+    exec_context.run_local_command(f"{command} b@example.com")
+    assert exec_context.get_stdout().strip() == ""
+    assert "403" in exec_context.get_stderr()
@@ -0,0 +1,131 @@
+import json
+
+
+def test_generate_dockerfile(repo_root, exec_context, tmp_path):
+    location_dir = tmp_path / "location"
+    location_dir.mkdir()
+    (location_dir / "requirements.txt").write_text("dagster-cloud\n")
+    (location_dir / "repo.py").write_text("")
+
+    exec_context.set_env(
+        {
+            "INPUT_ENV_VARS": json.dumps({"FOO": "foo value", "PIP_INDEX_URL": "http://index"}),
+            "INPUT_BASE_IMAGE": "python:3.11-slim",
+            "GITHUB_STEP_SUMMARY": tmp_path / "summary.md",
+        }
+    )
+    exec_context.run_local_command(f"python {repo_root}/src/generate_dockerfile.py {location_dir}")
+
+    lines = (location_dir / "Dockerfile").read_text().splitlines()
+    # custom base images need to be enabled for the organization
+    assert lines[0] == "FROM python:3.8-slim"
+    assert lines[1] == 'ENV PIP_INDEX_URL="http://index"'
+    # dependencies are installed before the env vars are set and the code is copied
+    install = lines.index(
+        "RUN --mount=type=cache,target=/root/.cache/pip pip install -r requirements.txt"
+    )
+    assert lines.index("COPY requirements.txt ./") < install
+    assert install < lines.index('ENV FOO="foo value"') < lines.index("COPY . /opt/dagster/app")
+    assert "| `COPY requirements.txt ./` | requirements.txt |" in exec_context.tmp_file_content(
+        "summary.md"
+    )
+
+
+def test_generate_dockerfile_local_requirements(repo_root, exec_context, tmp_path):
+    (tmp_path / "requirements.txt").write_text("dagster-cloud\n-e .  # the location's package\n")
+    (tmp_path / "setup.py").write_text("")
+    exec_context.set_env({"INPUT_ENV_VARS": json.dumps({"GREETING": "héllo"})})
+    exec_context.run_local_command(f"python {repo_root}/src/generate_dockerfile.py {tmp_path}")
+
+    lines = (tmp_path / "Dockerfile").read_text(encoding="utf-8").splitlines()
+    assert 'ENV GREETING="héllo"' in lines
+    # `-e .` needs the code, so everything is installed in one layer after it is copied
+    assert "COPY requirements.txt ./" not in lines
+    assert "COPY setup.py ./" not in lines
+    assert lines.index("COPY . /opt/dagster/app") + 1 == lines.index(
+        "RUN --mount=type=cache,target=/root/.cache/pip pip install . && pip install -r"
+        " requirements.txt"
+    )
+
+
+def test_generate_dockerfile_pyproject(repo_root, exec_context, tmp_path):
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "location"\n')
+    exec_context.run_local_command(
+        f"python {repo_root}/src/generate_dockerfile.py {tmp_path} --multi-stage"
+    )
+
+    builder, runtime = (tmp_path / "Dockerfile").read_text().split("FROM python:3.8-slim\n")
+    # the build backend needs the sources, so the builder copies them before installing
+    assert builder.endswith(
+        "COPY . /opt/dagster/app\nRUN --mount=type=cache,target=/root/.cache/pip pip install .\n"
+    )
+    assert "COPY . /opt/dagster/app\n" in runtime
+    assert "pip install" not in runtime
+
+
+def test_generate_dockerfile_pyproject_without_package(repo_root, exec_context, tmp_path):
+    (tmp_path / "pyproject.toml").write_text("[tool.black]\nline-length = 100\n")
+    (tmp_path / "requirements.txt").write_text("dagster-cloud\n")
+    exec_context.run_local_command(f"python {repo_root}/src/generate_dockerfile.py {tmp_path}")
+
+    lines = (tmp_path / "Dockerfile").read_text().splitlines()
+    assert "COPY requirements.txt ./" in lines
+    assert not any("pip install ." in line for line in lines)
+
+
+def test_generate_dockerfile_multi_stage(repo_root, exec_context, tmp_path):
+    (tmp_path / "requirements.txt").write_text("dagster-cloud\n")
+    exec_context.set_env({"INPUT_ENV_VARS": json.dumps({"PIP_INDEX_URL": "http://index"})})
+    exec_context.run_local_command(
+        f"python {repo_root}/src/generate_dockerfile.py {tmp_path} --multi-stage"
+    )
+
+    dockerfile = (tmp_path / "Dockerfile").read_text()
+    builder, runtime = dockerfile.split("FROM python:3.8-slim\n")
+    assert builder.startswith("FROM python:3.8-slim AS builder\n")
+    # the venv sees the base image's packages, which the runtime stage has too
+    assert "RUN python -m venv --system-site-packages /opt/dagster/venv\n" in builder
+    assert "pip install -r requirements.txt" in builder
+    # only the venv and the code are copied into the runtime stage, with all env vars
+    assert runtime.startswith("COPY --from=builder /opt/dagster/venv /opt/dagster/venv\n")
+    assert 'ENV PIP_INDEX_URL="http://index"' in runtime
+    assert "pip install" not in runtime
+
+
+def test_generate_dockerfile_multi_stage_pre_install(repo_root, exec_context, tmp_path):
+    (tmp_path / "requirements.txt").write_text("psycopg2\n")
+    (tmp_path / "dagster_cloud_pre_install.sh").write_text("apt-get install -y libpq-dev\n")
+    exec_context.run_local_command(
+        f"python {repo_root}/src/generate_dockerfile.py {tmp_path} --multi-stage"
+    )
+
+    builder, runtime = (tmp_path / "Dockerfile").read_text().split("FROM python:3.8-slim\n")
+    # the OS packages are needed to build the dependencies and to import them
+    assert "RUN ./dagster_cloud_pre_install.sh\n" in builder
+    assert "RUN ./dagster_cloud_pre_install.sh\n" in runtime
+    assert runtime.index("dagster_cloud_pre_install.sh") < runtime.index("COPY --from=builder")
+
+
+def test_generate_dockerfile_shared_base_image(repo_root, exec_context, tmp_path):
+    (tmp_path / "requirements.txt").write_text("dagster-cloud\n")
+    exec_context.run_local_command(
+        f"python {repo_root}/src/generate_dockerfile.py {tmp_path} --multi-stage"
+        " --shared-base-image=registry:shared-base-1234 --registry=registry"
+    )
+
+    lines = (tmp_path / "Dockerfile").read_text().splitlines()
+    assert lines[0] == "FROM registry:shared-base-1234 AS builder"
+    assert "RUN python -m venv --system-site-packages /opt/dagster/venv" in lines
+    assert "FROM registry:shared-base-1234" in lines
+
+
+def test_generate_dockerfile_other_shared_base_image(repo_root, exec_context, tmp_path):
+    (tmp_path / "requirements.txt").write_text("dagster-cloud\n")
+    exec_context.run_local_command(
+        f"python {repo_root}/src/generate_dockerfile.py {tmp_path}"
+        " --shared-base-image=other:latest --registry=registry"
+    )
+
+    # custom base images need to be enabled for the organization
+    lines = (tmp_path / "Dockerfile").read_text().splitlines()
+    assert lines[0] == "FROM python:3.8-slim"
@@ -0,0 +1,58 @@
+import pytest
+
+
+def test_gitlab_deploy_concurrently(repo_root, exec_context, src_module, tmp_path):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "dagster_cloud.yaml").write_text(
+        "locations:\n"
+        + "".join(
+            f"  - location_name: {name}\n    code_source:\n      package_name: {name}\n"
+            f"    build:\n      directory: {name}\n"
+            for name in ["good", "broken"]
+        )
+    )
+    for name in ["good", "broken"]:
+        (project_dir / name).mkdir()
+
+    deps_cache = src_module("deps_cache")
+    good_dir = project_dir / "good"
+    tag = deps_cache.cache_tag("project", [str(good_dir)], "3.11")
+    # any other command, ie the deploy of "broken", fails
+    exec_context.stub_command(
+        "dagster-cloud",
+        {
+            "serverless deploy-python-executable --location-name=good"
+            f" --location-file={project_dir / 'dagster_cloud.yaml'} --commit-hash=abc123"
+            " --git-url=https://gitlab.com/org/project/commit/abc123 --python-version=3.11"
+            f" --deps-cache-to={tag} --deps-cache-from={tag}"
+            f" --url=https://org.dagster.cloud/branch {good_dir}": "deployed good",
+        },
+    )
+    exec_context.set_env(
+        {
+            "DAGSTER_CLOUD_URL": "https://org.dagster.cloud",
+            "SERVERLESS_BASE_IMAGE_PREFIX": "base-",
+            "CI_PROJECT_NAME": "project",
+            "CI_PROJECT_URL": "https://gitlab.com/org/project",
+            "CI_COMMIT_SHORT_SHA": "abc123",
+            "PYTHON_VERSION": "3.11",
+            "MAX_PARALLEL_DEPLOYS": "2",
+        }
+    )
+
+    with pytest.raises(ValueError, match="Exit code 1"):
+        exec_context.run_local_command(
+            f"python {repo_root}/src/gitlab_action/deploy.py"
+            f" {project_dir / 'dagster_cloud.yaml'} branch"
+        )
+
+    # both locations are deployed, with their output prefixed by the location name
+    stdout = exec_context.get_stdout()
+    assert "[good] deployed good" in stdout
+    assert "[broken] ValueError: Invalid command" in stdout
+    lines = stdout.splitlines()
+    header = lines.index("Location  Status   Duration")
+    assert lines[header + 1].startswith("good      success")
+    assert lines[header + 2].startswith("broken    failed")
+    assert "Failed to update code locations: broken" in stdout
@@ -0,0 +1,51 @@
+import os
+import shutil
+import subprocess
+import sys
+
+# imports a script, printing the name of a module it can't find
+IMPORT_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+try:
+    __import__(sys.argv[2])
+except ModuleNotFoundError as err:
+    print(err.name)
+"""
+
+
+def copy_image_scripts(repo_root, image_root):
+    """Lays out the scripts of src/ the way src/Dockerfile copies them into the image."""
+    for line in (repo_root / "src" / "Dockerfile").read_text().splitlines():
+        parts = line.split()
+        if parts[:1] != ["COPY"] or not parts[1].startswith("src/"):
+            continue
+        source, target = repo_root / parts[1], image_root / parts[2].lstrip("/")
+        if source.is_dir():
+            shutil.copytree(source, target, ignore=shutil.ignore_patterns("__pycache__"))
+        else:
+            shutil.copy(source, target)
+
+
+def test_image_scripts_import(repo_root, tmp_path):
+    copy_image_scripts(repo_root, tmp_path)
+    scripts = [
+        os.path.relpath(os.path.join(dirpath, filename), tmp_path)
+        for dirpath, _, filenames in os.walk(tmp_path)
+        for filename in filenames
+        if filename.endswith(".py") and filename != "__init__.py"
+    ]
+    assert "gitlab_action/deploy.py" in scripts
+    src_modules = {path.stem for path in (repo_root / "src").glob("**/*.py")}
+
+    for script in scripts:
+        # scripts run as /<script>.py, so their own directory is first on sys.path
+        directory, filename = os.path.split(tmp_path / script)
+        missing = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SCRIPT, directory, filename[:-3]],
+            cwd=tmp_path,
+            encoding="utf-8",
+            env={"PATH": os.environ["PATH"]},
+        ).strip()
+        # third party packages are installed in the image, the action's own modules are copied
+        assert missing not in src_modules, f"{script} imports {missing}, which is not in the image"
@@ -0,0 +1,39 @@
+import json
+
+
+def test_image_report(repo_root, exec_context, tmp_path):
+    index = {
+        "mediaType": "application/vnd.oci.image.index.v1+json",
+        "manifests": [
+            {"digest": "sha256:arm", "platform": {"os": "linux", "architecture": "arm64"}},
+            {"digest": "sha256:amd", "platform": {"os": "linux", "architecture": "amd64"}},
+        ],
+    }
+    manifest = {"layers": [{"size": 1024 * 1024}, {"size": 512 * 1024}, {"size": 100}]}
+    exec_context.stub_command(
+        "docker",
+        {
+            "buildx imagetools inspect registry:5000/image:tag --raw": json.dumps(index),
+            "buildx imagetools inspect registry:5000/image@sha256:amd --raw": json.dumps(manifest),
+        },
+    )
+    exec_context.set_env({"GITHUB_STEP_SUMMARY": tmp_path / "summary.md"})
+    exec_context.run_local_command(
+        f"python {repo_root}/src/image_report.py registry:5000/image:tag --name loc"
+    )
+
+    row = "| loc | `registry:5000/image:tag` | 3 | 1.5 MB |"
+    assert row in exec_context.get_stdout()
+    assert row in exec_context.tmp_file_content("summary.md")
+
+
+def test_image_report_missing_image(repo_root, exec_context, tmp_path):
+    # the stub fails for any other image, the report must not fail the build
+    exec_context.stub_command("docker", {})
+    exec_context.set_env({"GITHUB_STEP_SUMMARY": tmp_path / "summary.md"})
+    exec_context.run_local_command(
+        f"python {repo_root}/src/image_report.py registry:5000/image:missing --name loc"
+    )
+
+    assert exec_context.get_stdout() == ""
+    assert not (tmp_path / "summary.md").exists()
@@ -0,0 +1,33 @@
+def get_outputs(exec_context):
+    return dict(line.split("=", 1) for line in exec_context.get_stdout().splitlines())
+
+
+def test_image_tag(repo_root, exec_context, tmp_path):
+    context_dir = tmp_path / "location"
+    (context_dir / "logs").mkdir(parents=True)
+    (context_dir / "Dockerfile").write_text("FROM python:3.11-slim\nCOPY . .\n")
+    (context_dir / "repo.py").write_text("")
+    (context_dir / "logs" / "run.log").write_text("1")
+    (context_dir / ".dockerignore").write_text("logs\n")
+
+    command = (
+        f"python {repo_root}/src/image_tag.py {context_dir} --registry registry --prefix prod-foo"
+    )
+    exec_context.run_local_command(command)
+    outputs = get_outputs(exec_context)
+    tag = outputs["tag"]
+    assert tag.startswith("prod-foo-")
+    assert outputs["exists"] == "false"
+
+    # ignored files do not change the tag, and an existing image is detected
+    (context_dir / "logs" / "run.log").write_text("2")
+    exec_context.reset()
+    exec_context.stub_command("docker", {f"manifest inspect registry:{tag}": "{}"})
+    exec_context.run_local_command(command)
+    assert get_outputs(exec_context) == {"tag": tag, "exists": "true"}
+
+    # any change to the build context changes the tag
+    (context_dir / "repo.py").write_text("changed = True\n")
+    exec_context.reset()
+    exec_context.run_local_command(command)
+    assert get_outputs(exec_context)["tag"] != tag
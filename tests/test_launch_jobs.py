@@ -0,0 +1,162 @@
+import json
+
+
+def start_status_server(http_server, responses, requests, events=None):
+    """Serves the run statuses in responses, one per request, recording the requests.
+
+    Event log requests are served from events, a list of the events logged by the time of each
+    status request.
+    """
+    event_requests = []
+
+    def respond(request):
+        variables = request.payload["variables"]
+        if "logsForRun" in request.payload["query"]:
+            logged = events[len(requests) - 1]
+            data = {}
+            for name, run_id in variables.items():
+                if name.startswith("run"):
+                    cursor = int(variables[name.replace("run", "cursor")] or 0)
+                    data[name] = {
+                        "__typename": "EventConnection",
+                        "events": logged[cursor:],
+                        "cursor": str(len(logged)),
+                        "hasMore": False,
+                    }
+                    event_requests.append((run_id, cursor))
+        else:
+            requests.append((request.path, variables["filter"]["runIds"]))
+            statuses = responses[len(requests) - 1]
+            data = {
+                "runsOrError": {
+                    "__typename": "Runs",
+                    "results": [
+                        {"runId": run_id, "status": status} for run_id, status in statuses.items()
+                    ],
+                }
+            }
+        return 200, {"data": data}
+
+    server = http_server(respond)
+    server.event_requests = event_requests
+    return server
+
+
+def launch_command(url, job, location):
+    return (
+        f"job launch --url {url} --deployment prod --api-token token"
+        f" --location {location} --repository __repository__ --job {job}"
+        " --tags {} --config-json {}"
+    )
+
+
+def test_launch_jobs(repo_root, exec_context, http_server, tmp_path):
+    requests = []
+    # the run of job b is still in progress when first polled
+    responses = [
+        {"run-a": "SUCCESS", "run-b": "STARTED"},
+        {"run-b": "FAILURE"},
+    ]
+    server = start_status_server(http_server, responses, requests)
+    url = server.url
+
+    exec_context.stub_command(
+        "dagster-cloud",
+        {
+            launch_command(url, "a", "default-location"): "run-a",
+            launch_command(url, "b", "other-location"): "run-b",
+        },
+    )
+    exec_context.set_env(
+        {
+            "DAGSTER_CLOUD_URL": url,
+            "DAGSTER_CLOUD_API_TOKEN": "token",
+            "INPUT_DEPLOYMENT": "prod",
+            "INPUT_LOCATION_NAME": "default-location",
+            "INPUT_JOBS": json.dumps(
+                [{"job_name": "a"}, {"job_name": "b", "location_name": "other-location"}]
+            ),
+            "INPUT_WAIT": "true",
+            "INPUT_INTERVAL": "0.1",
+            "GITHUB_OUTPUT": tmp_path / "output.txt",
+        }
+    )
+    exec_context.run_local_command(f"{{ python {repo_root}/src/launch_jobs.py; echo exit=$?; }}")
+
+    stdout = exec_context.get_stdout()
+    assert "exit=1" in stdout
+    assert "Run run-b is FAILURE" in stdout
+    # all runs are polled with one request, until each finished
+    assert requests == [("/prod/graphql", ["run-a", "run-b"]), ("/prod/graphql", ["run-b"])]
+    outputs = exec_context.tmp_file_content("output.txt").splitlines()
+    assert "run_id=run-a" in outputs
+    assert json.loads(outputs[1].split("=", 1)[1]) == {"run-a": "SUCCESS", "run-b": "FAILURE"}
+
+
+def test_launch_job_backoff(repo_root, exec_context, http_server, tmp_path):
+    requests = []
+    responses = [{"run-a": "STARTING"}, {"run-a": "STARTED"}, {"run-a": "SUCCESS"}]
+    server = start_status_server(http_server, responses, requests)
+    url = server.url
+    exec_context.stub_command("dagster-cloud", {launch_command(url, "a", "location"): "run-a"})
+    exec_context.set_env(
+        {
+            "DAGSTER_CLOUD_URL": url,
+            "DAGSTER_CLOUD_API_TOKEN": "token",
+            "INPUT_DEPLOYMENT": "prod",
+            "INPUT_LOCATION_NAME": "location",
+            "INPUT_JOB_NAME": "a",
+            "INPUT_WAIT": "true",
+            "INPUT_WAIT_STRATEGY": "backoff",
+            # caps the backoff, which otherwise starts at one second
+            "INPUT_INTERVAL": "0.05",
+            "GITHUB_OUTPUT": tmp_path / "output.txt",
+        }
+    )
+    exec_context.run_local_command(f"python {repo_root}/src/launch_jobs.py")
+
+    assert "for 1 runs with 3 status requests" in exec_context.get_stdout()
+    assert 'run_statuses={"run-a": "SUCCESS"}' in exec_context.tmp_file_content("output.txt")
+
+
+def test_launch_job_stream_events(repo_root, exec_context, http_server, tmp_path):
+    def event(message):
+        return {
+            "__typename": "EngineEvent",
+            "message": message,
+            "level": "INFO",
+            "timestamp": "1700000000000",
+            "stepKey": None,
+            "eventType": "ENGINE_EVENT",
+        }
+
+    requests = []
+    responses = [{"run-a": "STARTED"}, {"run-a": "SUCCESS"}]
+    events = [[event("first")], [event("first"), event("second"), event("x" * 200)]]
+    server = start_status_server(http_server, responses, requests, events)
+    url = server.url
+    exec_context.stub_command("dagster-cloud", {launch_command(url, "a", "location"): "run-a"})
+    exec_context.set_env(
+        {
+            "DAGSTER_CLOUD_URL": url,
+            "DAGSTER_CLOUD_API_TOKEN": "token",
+            "INPUT_DEPLOYMENT": "prod",
+            "INPUT_LOCATION_NAME": "location",
+            "INPUT_JOB_NAME": "a",
+            "INPUT_WAIT": "true",
+            "INPUT_INTERVAL": "0.05",
+            "INPUT_STREAM_EVENTS": "true",
+            "INPUT_MAX_EVENT_BYTES": "150",
+            "GITHUB_OUTPUT": tmp_path / "output.txt",
+        }
+    )
+    exec_context.run_local_command(f"python {repo_root}/src/launch_jobs.py")
+
+    lines = exec_context.get_stdout().splitlines()
+    messages = [line for line in lines if line.startswith("[run-a]")]
+    assert messages[0].endswith("INFO - ENGINE_EVENT - first")
+    assert messages[1].endswith("INFO - ENGINE_EVENT - second")
+    # printing stops at the size limit
+    assert messages[-1].startswith("[run-a] Stopped printing events after 150 bytes")
+    # each poll only fetches the events after the previous cursor
+    assert server.event_requests == [("run-a", 0), ("run-a", 1)]
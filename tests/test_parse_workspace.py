@@ -1,6 +1,7 @@
 import yaml
 import json
 import os
+import subprocess
 
 
 def test_parse_workspace(repo_root, exec_context, tmp_path):
@@ -43,3 +44,94 @@ def test_parse_workspace(repo_root, exec_context, tmp_path):
     exec_context.set_env({"DAGSTER_CLOUD_API_TOKEN": "true"})
     exec_context.run_local_command(command)
     assert "secrets_set=true" in exec_context.get_stdout()
+
+
+def test_parse_workspace_defaults(repo_root, exec_context, tmp_path):
+    dagster_cloud_file = tmp_path / "dagster_cloud.yaml"
+    workspace = {
+        "locations": [
+            {"location_name": "foo", "code_source": {"python_file": "repo.py"}},
+            {"location_name": "bar", "build": {"registry": "some-registry"}},
+        ]
+    }
+    dagster_cloud_file.write_text(yaml.dump(workspace))
+
+    command = f"python {repo_root}/src/parse_workspace.py {dagster_cloud_file}"
+    # run twice, the second run loads the cached locations
+    exec_context.set_env({"DAGSTER_CLOUD_ACTION_CACHE_DIR": tmp_path / "cache"})
+    exec_context.run_local_command(f"{command} > /dev/null && {command}")
+
+    expected = [
+        {
+            "name": "foo",
+            "directory": ".",
+            "build_folder": ".",
+            "registry": None,
+            "location_file": str(dagster_cloud_file),
+        },
+        {
+            "name": "bar",
+            "directory": ".",
+            "build_folder": ".",
+            "registry": "some-registry",
+            "location_file": str(dagster_cloud_file),
+        },
+    ]
+    assert f"build_info={json.dumps(expected)}" in exec_context.get_stdout()
+    assert len(os.listdir(tmp_path / "cache" / "workspace")) == 1
+
+
+def test_parse_workspace_changed_only(repo_root, exec_context, tmp_path):
+    workspace = {
+        "locations": [
+            {"location_name": name, "build": {"directory": name}}
+            for name in ["foo", "bar", "baz"]
+        ]
+    }
+    (tmp_path / "dagster_cloud.yaml").write_text(yaml.dump(workspace))
+    for name in ["foo", "bar", "baz", "shared"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "code.py").write_text("")
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("add", ".")
+    git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-m", "base")
+    git("tag", "base")
+    (tmp_path / "bar" / "code.py").write_text("changed = True\n")
+
+    command = f"python {repo_root}/src/parse_workspace.py dagster_cloud.yaml --base-ref=base"
+    exec_context.run_local_command(command)
+    build_info = get_build_info(exec_context)
+    assert [location["name"] for location in build_info] == []
+    # deploy jobs are skipped, a matrix over no locations fails the workflow
+    assert "has_changes=false" in exec_context.get_stdout()
+
+    git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-am", "bar")
+    exec_context.reset()
+    exec_context.run_local_command(command)
+    assert [location["name"] for location in get_build_info(exec_context)] == ["bar"]
+    assert "has_changes=true" in exec_context.get_stdout()
+
+    (tmp_path / "shared" / "code.py").write_text("changed = True\n")
+    git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-am", "shared")
+    exec_context.reset()
+    exec_context.run_local_command(f"{command} --watch-path=shared/*.py")
+    assert [location["name"] for location in get_build_info(exec_context)] == [
+        "foo",
+        "bar",
+        "baz",
+    ]
+
+    # unknown refs include all locations
+    exec_context.reset()
+    exec_context.run_local_command(command.replace("=base", "=missing"))
+    assert len(get_build_info(exec_context)) == 3
+
+
+def get_build_info(exec_context):
+    for line in exec_context.get_stdout().splitlines():
+        if line.startswith("build_info="):
+            return json.loads(line.split("=", 1)[1])
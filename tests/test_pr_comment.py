@@ -0,0 +1,104 @@
+import pytest
+
+
+@pytest.fixture
+def github_api(http_server):
+    """A fake GitHub comments API, returns the server and the requests it received."""
+    requests = []
+    comments = []
+
+    def respond(request):
+        requests.append((request.command, request.path))
+        if request.command == "POST":
+            if server.drop_posts:
+                return None
+            comments.append({"id": 1, "user": {"login": "github-actions[bot]"}, **request.payload})
+            result = comments[-1]
+        elif request.command == "PATCH":
+            comments[0].update(request.payload)
+            result = comments[0]
+        else:
+            result = comments
+        request.close_connection = server.close_after_response
+        return 200, result
+
+    server = http_server(respond)
+    server.comments = comments
+    # like GitHub after a long build, close the kept-alive connection without telling
+    server.close_after_response = False
+    # drop the connection after receiving a POST, without responding
+    server.drop_posts = False
+    return server, requests
+
+
+def make_comment(src_module, server):
+    pr_comment = src_module("pr_comment")
+    return pr_comment.PullRequestComment(
+        repository="org/repo",
+        pr_number="5",
+        token="token",
+        org_url="https://org.dagster.cloud",
+        run_url="https://github.com/org/repo/actions/runs/1",
+        api_url=server.url,
+    )
+
+
+def test_pr_comment_create_and_update(src_module, github_api):
+    server, requests = github_api
+    comment = make_comment(src_module, server)
+    comment.update("branch", {"foo": "pending", "bar": "pending"})
+    comment.update("branch", {"foo": "success", "bar": "failed"})
+
+    # the comment is looked up once, created, then updated in place
+    assert requests == [
+        ("GET", "/repos/org/repo/issues/5/comments?per_page=100&page=1"),
+        ("POST", "/repos/org/repo/issues/5/comments"),
+        ("PATCH", "/repos/org/repo/issues/comments/1"),
+    ]
+    body = server.comments[0]["body"]
+    assert "| `bar` |" in body and "[Deploy failed]" in body and "[View in Cloud]" in body
+
+
+def test_pr_comment_updates_existing(src_module, github_api):
+    server, requests = github_api
+    make_comment(src_module, server).update("branch", {"foo": "pending"})
+
+    # a later deploy finds the comment of the first one
+    requests.clear()
+    make_comment(src_module, server).update("branch", {"foo": "success"})
+    assert [method for method, _ in requests] == ["GET", "PATCH"]
+    assert "[View in Cloud]" in server.comments[0]["body"]
+
+
+def test_pr_comment_reconnects(src_module, github_api, capsys):
+    server, requests = github_api
+    server.close_after_response = True
+    comment = make_comment(src_module, server)
+    comment.update("branch", {"foo": "pending"})
+    comment.update("branch", {"foo": "success"})
+
+    assert [method for method, _ in requests] == ["GET", "POST", "PATCH"]
+    assert "[View in Cloud]" in server.comments[0]["body"]
+    assert "Ignoring failure" not in capsys.readouterr().out
+
+
+def test_pr_comment_latest_update_wins(src_module, github_api):
+    server, requests = github_api
+    comment = make_comment(src_module, server)
+    for status in ["pending", "failed", "success"]:
+        comment.update("branch", {"foo": status}, wait=False)
+    comment.wait()
+
+    # updates not sent yet are replaced by newer ones, never sent after them
+    assert "[View in Cloud]" in server.comments[0]["body"]
+    assert len(requests) <= 4
+
+
+def test_pr_comment_does_not_repost(src_module, github_api, capsys):
+    server, requests = github_api
+    server.drop_posts = True
+    make_comment(src_module, server).update("branch", {"foo": "pending"})
+
+    # the server may have created the comment, posting again could add a second one
+    assert [method for method, _ in requests] == ["GET", "POST"]
+    assert "Ignoring failure" in capsys.readouterr().out
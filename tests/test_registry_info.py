@@ -25,3 +25,39 @@ def test_registry_info(exec_context, action_docker_image_id):
     assert github_env["AWS_ECR_PASSWORD"] == "pw"
     assert github_env["AWS_DEFAULT_REGION"] == "region"
     assert github_env["REGISTRY_URL"] == "http://reg-url"
+
+
+def test_registry_info_reused(repo_root, exec_context, tmp_path):
+    env = {
+        "DAGSTER_CLOUD_URL": "http://dagster.cloud/test",
+        "INPUT_DEPLOYMENT": "prod",
+        "DAGSTER_CLOUD_API_TOKEN": "api-token",
+        "GITHUB_ENV": exec_context.tmp_file_path("github.env"),
+        "RUNNER_TEMP": tmp_path,
+    }
+    exec_context.set_env(env)
+    exec_context.stub_command(
+        "dagster-cloud",
+        {
+            "serverless registry-info --url http://dagster.cloud/test/prod --api-token api-token": "AWS_ECR_USERNAME=aws-username\nAWS_ECR_PASSWORD=ecr-password\nAWS_DEFAULT_REGION=region\nREGISTRY_URL=http://reg-url\n"
+        },
+    )
+    exec_context.run_local_command(f"python {repo_root}/src/registry_info.py")
+    assert "Loaded registry" in exec_context.get_stdout()
+
+    # later jobs reuse the stored credentials without calling dagster-cloud
+    (tmp_path / "dagster-cloud").unlink()
+    (tmp_path / "github.env").unlink()
+    exec_context.reset()
+    exec_context.set_env(env)
+    exec_context.run_local_command(f"python {repo_root}/src/registry_info.py")
+    assert "Reusing registry information" in exec_context.get_stdout()
+    github_env = dict(
+        line.strip().split("=", 1)
+        for line in exec_context.tmp_file_content("github.env").splitlines()
+    )
+    assert github_env["AWS_ECR_PASSWORD"] == "ecr-password"
+    assert github_env["REGISTRY_URL"] == "http://reg-url"
+    # the stored credentials are encrypted
+    stored = list((tmp_path / "_github_home/.cache/dagster-cloud-action/registry-info").iterdir())
+    assert b"ecr-password" not in stored[0].read_bytes()
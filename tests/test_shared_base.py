@@ -0,0 +1,47 @@
+import yaml
+
+
+def get_outputs(exec_context):
+    return dict(line.split("=", 1) for line in exec_context.get_stdout().splitlines())
+
+
+def test_shared_base(repo_root, exec_context, tmp_path):
+    workspace = {
+        "locations": [
+            {"location_name": name, "build": {"directory": name}} for name in ["foo", "bar"]
+        ]
+    }
+    (tmp_path / "dagster_cloud.yaml").write_text(yaml.dump(workspace))
+    for name, extra in [("foo", "pandas"), ("bar", "--index-url http://index\nnumpy")]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "requirements.txt").write_text(
+            f"dagster-cloud  # comment\ndagster == 1.5\n{extra}\n"
+        )
+
+    command = (
+        f"python {repo_root}/src/shared_base.py dagster_cloud.yaml --registry registry"
+        " --output-dir shared-base"
+    )
+    exec_context.run_local_command(command)
+    outputs = get_outputs(exec_context)
+    assert outputs["image"].startswith("registry:shared-base-")
+    assert outputs["exists"] == "false"
+    # only the requirements of all locations are installed in the shared base image
+    assert exec_context.tmp_file_content("shared-base/requirements.txt") == (
+        "dagster-cloud\ndagster==1.5\n"
+    )
+    assert exec_context.tmp_file_content("shared-base/Dockerfile").startswith(
+        "FROM python:3.8-slim\n"
+    )
+
+    # the extras of a location do not change the tag
+    (tmp_path / "foo" / "requirements.txt").write_text("dagster==1.5\ndagster-cloud\nscipy\n")
+    exec_context.reset()
+    exec_context.run_local_command(command)
+    assert get_outputs(exec_context)["image"] == outputs["image"]
+
+    # a single location has nothing to share with
+    (tmp_path / "bar" / "requirements.txt").unlink()
+    exec_context.reset()
+    exec_context.run_local_command(command)
+    assert get_outputs(exec_context) == {"image": "", "exists": "false"}
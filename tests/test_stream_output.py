@@ -0,0 +1,28 @@
+import sys
+
+
+def test_run(src_module, capsys):
+    stream_output = src_module("stream_output")
+    # 2000 lines of 100 bytes are several chunks, with lines split across chunk boundaries
+    script = "import sys\nfor i in range(2000): sys.stdout.write(f'{i:05d}' + 'x' * 94 + '\\n')\n"
+    script += "sys.stdout.write('last line without newline')\nsys.exit(3)\n"
+    assert 2000 * 100 > 2 * stream_output.CHUNK_SIZE
+
+    seen = []
+    returncode, tail = stream_output.run([sys.executable, "-c", script], "[foo] ", seen.append)
+
+    assert returncode == 3
+    # the matcher sees every complete line, only the last lines are kept
+    assert len(seen) == 2001
+    assert all(line == f"{i:05d}" + "x" * 94 + "\n" for i, line in enumerate(seen[:2000]))
+    assert len(tail) == stream_output.DEFAULT_TAIL_LINES
+    assert tail[0].startswith("01501") and tail[-1] == "last line without newline"
+
+    stdout = capsys.readouterr().out.splitlines()
+    assert stdout[1:] == ["[foo] " + line.rstrip("\n") for line in seen]
+
+
+def test_run_tail_lines(src_module, capsys):
+    stream_output = src_module("stream_output")
+    returncode, tail = stream_output.run(["seq", "10"], tail_lines=3)
+    assert (returncode, tail) == (0, ["8\n", "9\n", "10\n"])